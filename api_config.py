@@ -0,0 +1,38 @@
+"""
+Settings shared by the dataGet* fetchers.
+
+.env is loaded when this module is imported, so any module that reads its
+settings from the environment at import time (raw_archive, for example)
+sees values set there. The API key itself is only checked on first use.
+"""
+import os
+from functools import lru_cache
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+@lru_cache(maxsize=None)
+def get_api_key():
+    """
+    Load the API key from the environment (or .env) on first use.
+    """
+    api_key = os.getenv("API_KEY")
+    if not api_key:
+        raise ValueError("API_KEY is not set. Please check your .env file.")
+    return api_key
+
+def get_auth_headers():
+    """
+    Return the headers for authentication using Bearer token.
+    """
+    return {"Authorization": f"Bearer {get_api_key()}"}
+
+def season_csv_name(prefix, years):
+    """
+    File name for a fetch covering `years`, e.g. games_2000_2024.csv, so a
+    partial refresh never overwrites the full-history file.
+    """
+    years = list(years)
+    return f"{prefix}_{min(years)}_{max(years)}.csv"
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Single command line entry point for every pipeline stage.
+
+Stage modules (and with them requests, pandas and pymongo) are imported only
+inside the command that needs them, and the API key / MONGO_URI are read on
+first use, so `--help`, `status` and `fetch --dry-run` start instantly.
+
+Usage:
+    python cli.py fetch games --start 2020 --end 2024
+    python cli.py fetch records --dry-run
+    python cli.py load all
+    python cli.py clean
+    python cli.py status
+    python cli.py stream games --sink mongo      (see: python cli.py stream --help)
+    python cli.py --profile sample load games    (profile any command)
+"""
+import argparse
+import importlib
+import os
+import sys
+
+from profiling import PROFILE_MODES, profile_stage
+
+OUTPUT_DIR = "output_directory"
+
+# dataset -> (module, API endpoint, fetched per season)
+FETCHERS = {
+    "games": ("dataGetgames", "/games", True),
+    "records": ("dataGetrecords", "/records", True),
+    "teams": ("dataGetteams", "/teams", False),
+    "teamstats": ("dataGetteamstats", "/stats/season", True),
+    "playerstats": ("dataGetGamePlayerStats", "/games + per-game player stats", True),
+    "seasons": ("partitioned_fetch", "/games + /records + /stats/season", True),
+}
+
+# Fetchers that can rebuild their CSV from raw_archive/ (season datasets
+# replay through `stream --from-archive` instead)
+ARCHIVE_REPLAY = {"teams", "playerstats"}
+
+# dataset -> (module, loader function, default CSV)
+LOADERS = {
+    "teams": ("load_teams_to_mongodb", "load_teams_to_mongodb", "output_directory/teams.csv"),
+    "games": ("load_games_to_mongodb", "load_games_to_mongodb", "output_directory/games_2000_2024.csv"),
+    "records": ("load_records_to_mongodb", "load_records_to_mongodb", "output_directory/records_2000_2024.csv"),
+    "teamstats": ("load_stats_to_mongodb", "load_stats_to_mongodb", "output_directory/season_stats_2000_2024.csv"),
+}
+
+# Commands that hand their arguments straight to a module's own main(argv)
+PASSTHROUGH = {
+    "stream": ("stream_pipeline", "Stream seasons from the API through transform into a sink"),
+    "metrics": ("derived_metrics", "Compute per-game advanced stats"),
+    "windows": ("window_features", "Compute rolling and cumulative team-season features"),
+    "h2h": ("head_to_head", "Build the head-to-head matrix"),
+    "serve": ("query_api", "Serve the cached read API"),
+    "venues": ("venues", "Build the venue dimension and travel distances"),
+    "archive": ("raw_archive", "List archived raw API responses"),
+    "snapshot": ("snapshots", "Create, compare and publish dataset snapshots"),
+}
+
+
+def cmd_fetch(args):
+    module_name, endpoint, per_year = FETCHERS[args.dataset]
+    years = range(args.start, args.end + 1)
+    if args.from_archive and args.dataset not in ARCHIVE_REPLAY:
+        print(f"--from-archive is not supported for {args.dataset}; "
+              "season datasets replay with: python cli.py stream <dataset> --from-archive")
+        sys.exit(1)
+    if args.dry_run:
+        if per_year:
+            print(f"Would fetch {endpoint} for {len(years)} seasons ({args.start}-{args.end}) "
+                  f"into {args.output_dir}/")
+        else:
+            print(f"Would fetch {endpoint} once into {args.output_dir}/")
+        return
+    options = {"from_archive": True} if args.from_archive else {}
+    module = importlib.import_module(module_name)
+    if args.dataset == "seasons":
+        # partitioned_fetch parses its own options, including the rate budget
+        argv = ["--start", str(args.start), "--end", str(args.end), "--output-dir", args.output_dir]
+        if args.rate:
+            argv += ["--rate", str(args.rate)]
+        if args.workers:
+            argv += ["--workers", str(args.workers)]
+        module.main(argv)
+    elif per_year:
+        module.main(years=years, output_dir=args.output_dir, **options)
+    else:
+        module.main(output_dir=args.output_dir, **options)
+
+def cmd_load(args):
+    datasets = list(LOADERS) if args.dataset == "all" else [args.dataset]
+    if args.dry_run:
+        for dataset in datasets:
+            csv_path = args.csv or LOADERS[dataset][2]
+            state = "found" if os.path.exists(csv_path) else "missing"
+            print(f"Would load {csv_path} ({state}) into cfb.{dataset}")
+        return
+    from document_shaping import print_size_report
+    from mongo_client import connect_to_mongodb, print_pool_report
+    from validation import print_validation_report
+    # All loaders share one client, so later loads reuse the warm pool
+    db = connect_to_mongodb()
+    for dataset in datasets:
+        module_name, function_name, default_csv = LOADERS[dataset]
+        loader = getattr(importlib.import_module(module_name), function_name)
+        inserted_count = loader(args.csv or default_csv, db)
+        print(f"Successfully loaded {inserted_count} {dataset} into MongoDB")
+    print_size_report()
+    print_validation_report()
+    print_pool_report()
+
+def cmd_clean(args):
+    import runpy
+    runpy.run_path(os.path.join("cleaned_data", "cleanrecords.py"), run_name="__main__")
+
+def count_lines(path):
+    """Count lines without parsing the file"""
+    with open(path, "rb") as f:
+        return sum(chunk.count(b"\n") for chunk in iter(lambda: f.read(1 << 20), b""))
+
+def cmd_status(args):
+    if not os.path.isdir(args.output_dir):
+        print(f"No output directory: {args.output_dir}")
+        return
+    for name in sorted(os.listdir(args.output_dir)):
+        path = os.path.join(args.output_dir, name)
+        if not os.path.isfile(path):
+            continue
+        size = os.path.getsize(path) / 1e6
+        print(f"{name:<45} {size:8.2f} MB  {count_lines(path):>9} lines")
+
+def add_global_options(parser):
+    parser.add_argument("--profile", choices=PROFILE_MODES,
+                        help="Profile the command (cProfile, stack sampling or tracemalloc)")
+    parser.add_argument("--profile-dir", default="profiles",
+                        help="Directory for profile output (default: profiles)")
+
+def parse_global_options(argv):
+    """Split the options every command accepts from the command line"""
+    parser = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+    add_global_options(parser)
+    return parser.parse_known_args(argv)
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="cli.py",
+        description="College football data pipeline",
+    )
+    add_global_options(parser)
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    commands.required = True
+
+    fetch = commands.add_parser("fetch", help="Fetch a dataset from the API to CSV")
+    fetch.add_argument("dataset", choices=list(FETCHERS))
+    fetch.add_argument("--start", type=int, default=2000, help="First season (inclusive)")
+    fetch.add_argument("--end", type=int, default=2024, help="Last season (inclusive)")
+    fetch.add_argument("--output-dir", default=OUTPUT_DIR)
+    fetch.add_argument("--rate", type=float, help="API requests per second (seasons only)")
+    fetch.add_argument("--workers", type=int, help="Requests in flight at once (seasons only)")
+    fetch.add_argument("--from-archive", action="store_true",
+                       help="Rebuild the CSV from raw_archive/ instead of the API (teams, playerstats)")
+    fetch.add_argument("--dry-run", action="store_true", help="Show what would be fetched")
+    fetch.set_defaults(func=cmd_fetch)
+
+    load = commands.add_parser("load", help="Load a CSV into MongoDB")
+    load.add_argument("dataset", choices=list(LOADERS) + ["all"])
+    load.add_argument("--csv", help="CSV to load (defaults to the fetcher's output)")
+    load.add_argument("--dry-run", action="store_true", help="Show what would be loaded")
+    load.set_defaults(func=cmd_load)
+
+    clean = commands.add_parser("clean", help="Flatten the records CSV (cleaned_data/cleanrecords.py)")
+    clean.set_defaults(func=cmd_clean)
+
+    status = commands.add_parser("status", help="List local output files")
+    status.add_argument("--output-dir", default=OUTPUT_DIR)
+    status.set_defaults(func=cmd_status)
+
+    for name, (_, description) in PASSTHROUGH.items():
+        commands.add_parser(name, help=description, add_help=False)
+    return parser
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    options, argv = parse_global_options(argv)
+
+    # Stage modules with their own argument parsers get the rest of the line
+    if argv and argv[0] in PASSTHROUGH:
+        stage = argv[0]
+        # Imported inside run() so module import time shows up in profiles
+        run = lambda: importlib.import_module(PASSTHROUGH[stage][0]).main(argv[1:])
+    else:
+        args = build_parser().parse_args(argv)
+        stage = "-".join(filter(None, [args.command, getattr(args, "dataset", None)]))
+        run = lambda: args.func(args)
+
+    if not options.profile:
+        return run()
+    with profile_stage(stage, options.profile, output_dir=options.profile_dir):
+        return run()
+
+if __name__ == "__main__":
+    main()
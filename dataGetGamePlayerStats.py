@@ -4,25 +4,17 @@ import sys
 import csv
 import time
 import requests
-from dotenv import load_dotenv
 
-load_dotenv()
-
-# Retrieve your API key from the environment
-API_KEY = os.getenv("API_KEY")
-if not API_KEY:
-    print("Error: API_KEY is not set. Please check your .env file.")
-    sys.exit(1)
+from api_config import get_api_key, get_auth_headers, season_csv_name
+from raw_archive import archive_response, iter_archive
+from schema_registry import ordered_columns, report_drift
 
 # Base URLs for the endpoints
 BASE_URL_GAMES = "https://api.collegefootballdata.com/games"
 BASE_URL_STATS = "https://api.collegefootballdata.com/games/GetGamePlayerStats"
 
-def get_auth_headers():
-    """
-    Return the headers for authentication using Bearer token.
-    """
-    return {"Authorization": f"Bearer {API_KEY}"}
+# Seasons fetched by default (inclusive of 2024)
+YEARS = range(2000, 2025)
 
 def fetch_games_for_year(year):
     """
@@ -57,13 +49,24 @@ def fetch_player_stats_for_game(game_id):
         print(f"Error fetching player stats for game {game_id}: {err}")
     return None
 
-def main():
-    all_stats = []
+def tag_game_stats(year, game_id, stats):
+    """
+    Tag copies of a game's stats records with the season year and game_id,
+    leaving the API response itself untouched for the archive.
+    """
+    return [dict(stat, year=year, gameId=game_id) for stat in stats]
 
-    # Loop through each year from 2000 to 2024 (inclusive)
-    for year in range(2000, 2025):
+def fetch_all_player_stats(years=YEARS):
+    """
+    Fetch player stats for every FBS game in `years`.
+    """
+    all_stats = []
+    for year in years:
         print(f"\nFetching games for year: {year}")
         games = fetch_games_for_year(year)
+        year_stats = []
+        # One archive line per game: its id and the response exactly as received
+        year_responses = []
         if games:
             print(f"Retrieved {len(games)} games for {year}.")
             # For each game, get the game_id and fetch its player stats.
@@ -74,38 +77,41 @@ def main():
                     continue
                 stats = fetch_player_stats_for_game(game_id)
                 if stats:
-                    # If the API returns multiple records per game, iterate over them
-                    # Tag each record with its season year and game_id
-                    for stat in stats:
-                        stat["year"] = year
-                        stat["gameId"] = game_id
-                        all_stats.append(stat)
+                    year_responses.append({"gameId": game_id, "response": stats})
+                    # If the API returns multiple records per game, tag each one
+                    year_stats.extend(tag_game_stats(year, game_id, stats))
                     print(f"Added {len(stats)} stats records for game {game_id}.")
                 else:
                     print(f"No stats found for game {game_id}.")
                 time.sleep(0.5)  # Brief pause to be polite to the API
         else:
             print(f"Failed to fetch games for year: {year}")
+        # One shard per season rather than one per game request
+        archive_response("game_player_stats", year, year_responses)
+        all_stats.extend(year_stats)
         time.sleep(1)  # Pause between years to avoid rate limiting
+    return all_stats
 
-    if all_stats:
-        print("\nSample game player stats record:")
-        print(all_stats[0])
-    else:
-        print("No player stats data retrieved.")
-        sys.exit(1)
+def player_stats_from_archive(years=YEARS):
+    """
+    Rebuild the tagged player stats from archived per-game responses
+    instead of refetching every game.
+    """
+    all_stats = []
+    for year, responses in iter_archive("game_player_stats", years):
+        for entry in responses:
+            all_stats.extend(tag_game_stats(year, entry["gameId"], entry["response"]))
+        print(f"Read {len(responses)} archived games for {year}.")
+    return all_stats
+
+def save_to_csv(all_stats, csv_file_path):
+    """
+    Write the player stats records to CSV.
+    """
+    # Registered columns first (in a stable order), then any new API fields
+    report_drift("game_player_stats", all_stats)
+    headers = ordered_columns("game_player_stats", all_stats)
 
-    # Create output directory if it does not exist.
-    output_dir = "output_directory"  # Change this as needed
-    os.makedirs(output_dir, exist_ok=True)
-    csv_file_path = os.path.join(output_dir, "game_player_stats_2000_2024.csv")
-    
-    # Determine CSV header by collecting all keys present in the records.
-    headers = set()
-    for stat in all_stats:
-        headers.update(stat.keys())
-    headers = list(headers)
-    
     # Write the aggregated data to CSV.
     try:
         with open(csv_file_path, "w", newline="", encoding="utf-8") as csvfile:
@@ -117,5 +123,27 @@ def main():
     except Exception as err:
         print(f"Error writing CSV file: {err}")
 
+def main(years=YEARS, output_dir="output_directory", from_archive=False):
+    if from_archive:
+        all_stats = player_stats_from_archive(years)
+    else:
+        try:
+            get_api_key()
+        except ValueError as err:
+            print(f"Error: {err}")
+            sys.exit(1)
+        all_stats = fetch_all_player_stats(years)
+
+    if all_stats:
+        print("\nSample game player stats record:")
+        print(all_stats[0])
+    else:
+        print("No player stats data retrieved.")
+        sys.exit(1)
+
+    # Create output directory if it does not exist.
+    os.makedirs(output_dir, exist_ok=True)
+    save_to_csv(all_stats, os.path.join(output_dir, season_csv_name("game_player_stats", years)))
+
 if __name__ == "__main__":
     main()
@@ -2,26 +2,18 @@
 import os
 import sys
 import csv
-import time
 import requests
-from dotenv import load_dotenv
 
-load_dotenv()
-
-# Retrieve your API key from the environment
-API_KEY = os.getenv("API_KEY")
-if not API_KEY:
-    print("Error: API_KEY is not set. Please check your .env file.")
-    sys.exit(1)
+from api_config import get_api_key, get_auth_headers, season_csv_name
+from partitioned_fetch import fetch_years
+from raw_archive import archive_response
+from schema_registry import ordered_columns, report_drift
 
 # Base URL for the getGames endpoint
 BASE_URL = "https://api.collegefootballdata.com/games"
 
-def get_auth_headers():
-    """
-    Return the headers for authentication using Bearer token.
-    """
-    return {"Authorization": f"Bearer {API_KEY}"}
+# Seasons fetched by default (inclusive of 2024)
+YEARS = range(2000, 2025)
 
 def ping_api():
     """
@@ -57,6 +49,7 @@ def fetch_games_for_year(year):
         response = requests.get(BASE_URL, headers=get_auth_headers(), params=params, timeout=20)
         response.raise_for_status()
         games = response.json()
+        archive_response("games", year, games)
         return games
     except requests.exceptions.HTTPError as http_err:
         print(f"HTTP error for year {year}: {http_err}")
@@ -68,63 +61,55 @@ def fetch_games_for_year(year):
         print(f"Error for year {year}: {err}")
     return None
 
-def main():
-    # Ping the API first
-    if not ping_api():
-        print("Failed to connect to the API. Please check your network connection and API key.")
-        sys.exit(1)
-    
+def unpivot_games(games, year):
+    """
+    Expand each FBS home game into two team-perspective rows (home and away).
+    """
+    rows = []
+    for game in games:
+        # Only include games where home_division is 'fbs'
+        if game.get('home_division') == 'fbs':
+            game["year"] = year
+
+            # Create a home row
+            home_game = game.copy()
+            # Adjust these key names if necessary (e.g., "home_team_id" vs "home_id")
+            home_game["team_id"] = game.get("home_id")
+            home_game["game_location"] = "Home"
+            home_game["opp_team_id"] = game.get("away_id")
+
+            # Create an away row
+            away_game = game.copy()
+            away_game["team_id"] = game.get("away_id")
+            away_game["game_location"] = "Away"
+            away_game["opp_team_id"] = game.get("home_id")
+
+            # Append both rows to the list
+            rows.extend([home_game, away_game])
+    return rows
+
+def fetch_all_games(years=YEARS):
+    """
+    Fetch and unpivot games for every year in `years`.
+    """
     all_games = []
-    
-    # Loop through each year from 2000 to 2024 (inclusive)
-    for year in range(2000, 2025):
-        print(f"Fetching games for year: {year}")
-        games = fetch_games_for_year(year)
+    # Years are fetched concurrently under the shared rate budget
+    for year, games in fetch_years(fetch_games_for_year, years):
         if games:
-            for game in games:
-                # Only include games where home_division is 'fbs'
-                if game.get('home_division') == 'fbs':
-                    game["year"] = year
-
-                    # Create a home row
-                    home_game = game.copy()
-                    # Adjust these key names if necessary (e.g., "home_team_id" vs "home_id")
-                    home_game["team_id"] = game.get("home_id")
-                    home_game["game_location"] = "Home"
-                    home_game["opp_team_id"] = game.get("away_id")
-                    
-                    # Create an away row
-                    away_game = game.copy()
-                    away_game["team_id"] = game.get("away_id")
-                    away_game["game_location"] = "Away"
-                    away_game["opp_team_id"] = game.get("home_id")
-                    
-                    # Append both rows to the list
-                    all_games.extend([home_game, away_game])
+            all_games.extend(unpivot_games(games, year))
             print(f"Retrieved {len(games)} games for {year} (expanded to {len(all_games)} rows after unpivoting)")
         else:
             print(f"Failed to fetch games for year: {year}")
-        time.sleep(1)  # Pause to avoid hitting API rate limits
-    
-    if all_games:
-        # Print one transformed game to check the data
-        print("Sample transformed game record:")
-        print(all_games[0])
-    else:
-        print("No games retrieved.")
-        sys.exit(1)
+    return all_games
+
+def save_to_csv(all_games, csv_file_path):
+    """
+    Write the team-perspective game rows to CSV.
+    """
+    # Registered columns first (in a stable order), then any new API fields
+    report_drift("games", all_games)
+    headers = ordered_columns("games", all_games)
 
-    # Set the output directory (modify this path as needed)
-    output_dir = "output_directory"  # Change this to your desired directory
-    os.makedirs(output_dir, exist_ok=True)
-    csv_file_path = os.path.join(output_dir, "games_2000_2024.csv")
-    
-    # Determine the CSV header by collecting all keys present in the game objects.
-    headers = set()
-    for game in all_games:
-        headers.update(game.keys())
-    headers = list(headers)
-    
     # Write the aggregated game data to CSV
     try:
         with open(csv_file_path, "w", newline="", encoding="utf-8") as csvfile:
@@ -136,5 +121,30 @@ def main():
     except Exception as err:
         print(f"Error writing CSV file: {err}")
 
+def main(years=YEARS, output_dir="output_directory"):
+    try:
+        get_api_key()
+    except ValueError as err:
+        print(f"Error: {err}")
+        sys.exit(1)
+
+    # Ping the API first
+    if not ping_api():
+        print("Failed to connect to the API. Please check your network connection and API key.")
+        sys.exit(1)
+    
+    all_games = fetch_all_games(years)
+    
+    if all_games:
+        # Print one transformed game to check the data
+        print("Sample transformed game record:")
+        print(all_games[0])
+    else:
+        print("No games retrieved.")
+        sys.exit(1)
+
+    os.makedirs(output_dir, exist_ok=True)
+    save_to_csv(all_games, os.path.join(output_dir, season_csv_name("games", years)))
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
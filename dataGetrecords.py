@@ -2,20 +2,16 @@ import requests
 import os
 import sys
 import csv
-import time
-from dotenv import load_dotenv
 
-load_dotenv()
-
-API_KEY = os.getenv("API_KEY")
+from api_config import get_api_key, get_auth_headers, season_csv_name
+from partitioned_fetch import fetch_years
+from raw_archive import archive_response
+from schema_registry import ordered_columns, report_drift
 
 BASE_URL = "https://api.collegefootballdata.com/records"
 
-def get_auth_headers():
-    """
-    Return the headers for authentication using Bearer token.
-    """
-    return {"Authorization": f"Bearer {API_KEY}"}
+# Seasons fetched by default (inclusive of 2024)
+YEARS = range(2000, 2025)
 
 def ping_api():
     """
@@ -51,7 +47,9 @@ def fetch_records_for_year(year):
         response = requests.get(BASE_URL, headers=get_auth_headers(), params=params, timeout=10)
         response.raise_for_status()
         print(f"Successfully fetched records for year {year}")
-        return response.json()  # Return the actual data instead of True
+        records = response.json()
+        archive_response("records", year, records)
+        return records
     except requests.exceptions.HTTPError as http_err:
         print(f"HTTP error during API request: {http_err}")
     except requests.exceptions.ConnectionError as conn_err:
@@ -62,36 +60,27 @@ def fetch_records_for_year(year):
         print(f"Unexpected error during API request: {err}")
     return None  # Return None instead of False on error
 
-def main():
-    # Ping the API first
-    if not ping_api():
-        sys.exit(1)
-    
+def fetch_all_records(years=YEARS):
+    """
+    Fetch team records for every year in `years`.
+    """
     all_records = []
-
-    # Fetch records for the year's selected
-    for year in range(2000, 2025):
-        print(f"Fetching records for year: {year}")
-        records = fetch_records_for_year(year)
+    # Years are fetched concurrently under the shared rate budget
+    for year, records in fetch_years(fetch_records_for_year, years):
         if records:  # This will handle both None and empty list cases
             all_records.extend(records)  # Use extend instead of append since records is a list
             print(f"Retrieved {len(records)} records for {year}")
         else:
             print(f"No records retrieved for {year}")
-        time.sleep(1)
-
-    # Print one record to check the data
-    if all_records:
-        print(all_records[0])
-
-    output_dir = "output_directory"
-    os.makedirs(output_dir, exist_ok=True)
-    csv_file_path = os.path.join(output_dir, "records_2000_2024.csv")
+    return all_records
 
-    headers = set()
-    for record in all_records:
-        headers.update(record.keys())
-    headers = list(headers)
+def save_to_csv(all_records, csv_file_path):
+    """
+    Write the raw records to CSV.
+    """
+    # Registered columns first (in a stable order), then any new API fields
+    report_drift("records", all_records)
+    headers = ordered_columns("records", all_records)
 
     try:
         with open(csv_file_path, "w", newline="", encoding="utf-8") as csvfile:
@@ -103,5 +92,25 @@ def main():
     except Exception as err:
         print(f"Error writing CSV file: {err}")
 
+def main(years=YEARS, output_dir="output_directory"):
+    try:
+        get_api_key()
+    except ValueError as err:
+        print(f"Error: {err}")
+        sys.exit(1)
+
+    # Ping the API first
+    if not ping_api():
+        sys.exit(1)
+    
+    all_records = fetch_all_records(years)
+
+    # Print one record to check the data
+    if all_records:
+        print(all_records[0])
+
+    os.makedirs(output_dir, exist_ok=True)
+    save_to_csv(all_records, os.path.join(output_dir, season_csv_name("records", years)))
+
 if __name__ == "__main__":
-    main()
+    main()
\ No newline at end of file
@@ -3,20 +3,13 @@ import os
 import sys
 import csv
 import time
-from dotenv import load_dotenv
 
-load_dotenv()
-
-API_KEY = os.getenv("API_KEY")
+from api_config import get_api_key, get_auth_headers
+from raw_archive import archive_response, load_shard
+from schema_registry import ordered_columns, report_drift
 
 BASE_URL = "https://api.collegefootballdata.com/teams"
 
-def get_auth_headers():
-    """
-    Return the headers for authentication using Bearer token.
-    """
-    return {"Authorization": f"Bearer {API_KEY}"}
-
 def ping_api():
     """
     Pings the API by making a minimal request to check connectivity.
@@ -44,7 +37,9 @@ def fetch_teams():
         response = requests.get(BASE_URL, headers=get_auth_headers(), timeout=10)
         response.raise_for_status()
         print("Successfully fetched teams data")
-        return response.json()
+        teams = response.json()
+        archive_response("teams", None, teams)
+        return teams
     except requests.exceptions.HTTPError as http_err:
         print(f"HTTP error during API request: {http_err}")
     except requests.exceptions.ConnectionError as conn_err:
@@ -55,13 +50,41 @@ def fetch_teams():
         print(f"Unexpected error during API request: {err}")
     return None
 
-def main():
-    # Ping the API first
-    if not ping_api():
-        sys.exit(1)
-    
-    # Fetch teams data
-    teams = fetch_teams()
+def save_to_csv(teams, csv_file_path):
+    """
+    Write the raw teams data to CSV.
+    """
+    # Registered columns first (in a stable order), then any new API fields
+    report_drift("teams", teams)
+    headers = ordered_columns("teams", teams)
+
+    try:
+        with open(csv_file_path, "w", newline="", encoding="utf-8") as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=headers)
+            writer.writeheader()
+            for team in teams:
+                writer.writerow(team)
+        print(f"CSV file has been saved to: {csv_file_path}")
+    except Exception as err:
+        print(f"Error writing CSV file: {err}")
+
+def main(output_dir="output_directory", from_archive=False):
+    if from_archive:
+        # Rebuild teams.csv from the archived response, e.g. after a location fix
+        teams = load_shard("teams")
+    else:
+        try:
+            get_api_key()
+        except ValueError as err:
+            print(f"Error: {err}")
+            sys.exit(1)
+
+        # Ping the API first
+        if not ping_api():
+            sys.exit(1)
+
+        # Fetch teams data
+        teams = fetch_teams()
     if not teams:
         print("No teams data retrieved")
         sys.exit(1)
@@ -72,25 +95,8 @@ def main():
     if teams:
         print(teams[0])
 
-    output_dir = "output_directory"
     os.makedirs(output_dir, exist_ok=True)
-    csv_file_path = os.path.join(output_dir, "teams.csv")
-
-    # Get all possible headers from the data
-    headers = set()
-    for team in teams:
-        headers.update(team.keys())
-    headers = list(headers)
-
-    try:
-        with open(csv_file_path, "w", newline="", encoding="utf-8") as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=headers)
-            writer.writeheader()
-            for team in teams:
-                writer.writerow(team)
-        print(f"CSV file has been saved to: {csv_file_path}")
-    except Exception as err:
-        print(f"Error writing CSV file: {err}")
+    save_to_csv(teams, os.path.join(output_dir, "teams.csv"))
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
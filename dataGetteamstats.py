@@ -1,17 +1,12 @@
 import requests
 import pandas as pd
 import os
-from dotenv import load_dotenv
-import time
 from datetime import datetime
 
-def get_api_key():
-    """Load API key from environment variable"""
-    load_dotenv()
-    api_key = os.getenv('API_KEY')
-    if not api_key:
-        raise ValueError("API_KEY not found in .env file")
-    return api_key
+from api_config import get_api_key, season_csv_name
+from partitioned_fetch import fetch_years
+from raw_archive import archive_response
+from schema_registry import ordered_columns, report_drift
 
 def fetch_season_stats(year, api_key):
     """Fetch season statistics for a given year"""
@@ -28,14 +23,38 @@ def fetch_season_stats(year, api_key):
     try:
         response = requests.get(base_url, headers=headers, params=params)
         response.raise_for_status()
-        return response.json()
+        stats = response.json()
+        archive_response("teamstats", year, stats)
+        return stats
     except requests.exceptions.RequestException as e:
         print(f"Error fetching data for year {year}: {str(e)}")
         return None
 
-def main():
+def fetch_all_season_stats(years, api_key):
+    """Fetch season statistics for every year in `years`, tagged with their year"""
+    all_stats = []
+    # Years are fetched concurrently under the shared rate budget
+    fetch = lambda year: fetch_season_stats(year, api_key)
+    for year, stats in fetch_years(fetch, years):
+        if stats:
+            all_stats.extend(tag_year(stats, year))
+    return all_stats
+
+def tag_year(stats, year):
+    """Tag each stat with its season year"""
+    for stat in stats:
+        stat['year'] = year
+    return stats
+
+def save_to_csv(all_stats, output_file):
+    """Save the season stats to CSV"""
+    report_drift("teamstats", all_stats)
+    df = pd.DataFrame(all_stats, columns=ordered_columns("teamstats", all_stats))
+    df.to_csv(output_file, index=False)
+    print(f"Data saved to {output_file}")
+
+def main(years=None, output_dir="output_directory"):
     # Create output directory if it doesn't exist
-    output_dir = "output_directory"
     os.makedirs(output_dir, exist_ok=True)
     
     # Get API key
@@ -43,31 +62,14 @@ def main():
     
     # Define year range (2000 to current year)
     current_year = datetime.now().year
-    years = range(2000, current_year + 1)
+    if years is None:
+        years = range(2000, current_year + 1)
     
-    # Initialize empty list to store all stats
-    all_stats = []
-    
-    # Fetch data for each year
-    for year in years:
-        print(f"Fetching stats for {year}...")
-        stats = fetch_season_stats(year, api_key)
-        
-        if stats:
-            for stat in stats:
-                stat['year'] = year
-            all_stats.extend(stats)
-            
-        # Sleep to respect rate limits
-        time.sleep(1)
-    
-    # Convert to DataFrame
-    df = pd.DataFrame(all_stats)
+    all_stats = fetch_all_season_stats(years, api_key)
     
     # Save to CSV
-    output_file = os.path.join(output_dir, f"season_stats_{2000}_{current_year}.csv")
-    df.to_csv(output_file, index=False)
-    print(f"Data saved to {output_file}")
+    output_file = os.path.join(output_dir, season_csv_name("season_stats", years))
+    save_to_csv(all_stats, output_file)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Vectorized per-game advanced stats over the team-perspective games table.
+
+Reads the unpivoted output of dataGetgames.py (one row per team per game)
+and computes margin, quarter-by-quarter differentials, Elo change, upset
+and comeback flags and rolling per-team averages in bulk with NumPy. The
+results are written to a sidecar CSV or the 'game_metrics' collection,
+keyed by (id, team_id) so they join back to the games collection.
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from mongo_client import connect_to_mongodb
+
+# Number of regulation periods; anything beyond is summed as overtime
+REGULATION_PERIODS = 4
+
+# Games used for the rolling per-team averages
+ROLLING_WINDOW = 5
+
+ROLLING_COLUMNS = ["margin", "team_points", "opp_points", "elo_change"]
+
+
+def line_scores_to_array(series):
+    """
+    Convert a column of line scores ("[7, 0, 3, 14]" strings or lists) into a
+    2D float array padded with NaN to the longest game in the column.
+    """
+    parsed = []
+    for value in series:
+        if isinstance(value, str):
+            value = value.strip("[] ")
+            value = [float(v) for v in value.split(",") if v.strip()] if value else []
+        elif not isinstance(value, (list, tuple)):
+            value = []
+        parsed.append(value)
+
+    width = max([REGULATION_PERIODS] + [len(v) for v in parsed])
+    scores = np.full((len(parsed), width), np.nan)
+    for i, value in enumerate(parsed):
+        scores[i, :len(value)] = value
+    return scores
+
+def team_perspective(df, home_column, away_column):
+    """Pick the home or away column depending on which side the row represents"""
+    is_home = (df["game_location"] == "Home").to_numpy()
+    home = pd.to_numeric(df[home_column], errors="coerce").to_numpy(dtype=float)
+    away = pd.to_numeric(df[away_column], errors="coerce").to_numpy(dtype=float)
+    return np.where(is_home, home, away), np.where(is_home, away, home)
+
+def compute_game_metrics(games):
+    """
+    Compute per-game derived metrics for every team-perspective row.
+    Returns a new DataFrame keyed by id, team_id, opp_team_id and year.
+    """
+    metrics = games[["id", "team_id", "opp_team_id", "year"]].copy()
+    if "week" in games:
+        metrics["week"] = games["week"]
+
+    team_points, opp_points = team_perspective(games, "home_points", "away_points")
+    metrics["team_points"] = team_points
+    metrics["opp_points"] = opp_points
+    margin = team_points - opp_points
+    metrics["margin"] = margin
+    with np.errstate(invalid="ignore"):
+        won = margin > 0
+
+    # Quarter-by-quarter differentials
+    home_lines = line_scores_to_array(games["home_line_scores"])
+    away_lines = line_scores_to_array(games["away_line_scores"])
+    width = max(home_lines.shape[1], away_lines.shape[1])
+    home_lines = np.pad(home_lines, ((0, 0), (0, width - home_lines.shape[1])), constant_values=np.nan)
+    away_lines = np.pad(away_lines, ((0, 0), (0, width - away_lines.shape[1])), constant_values=np.nan)
+    is_home = (games["game_location"] == "Home").to_numpy()[:, None]
+    line_diff = np.where(is_home, home_lines - away_lines, away_lines - home_lines)
+    for period in range(REGULATION_PERIODS):
+        metrics[f"q{period + 1}_diff"] = line_diff[:, period]
+    overtime = line_diff[:, REGULATION_PERIODS:]
+    if overtime.shape[1]:
+        played = ~np.isnan(overtime).all(axis=1)
+        metrics["ot_diff"] = np.where(played, np.nansum(overtime, axis=1), np.nan)
+    else:
+        metrics["ot_diff"] = np.nan
+
+    # Comebacks: won the game after trailing at the end of a period
+    running = np.nancumsum(line_diff, axis=1)
+    running[np.isnan(line_diff)] = np.nan
+    has_lines = ~np.isnan(line_diff).all(axis=1)
+    worst = np.full(len(games), np.nan)
+    worst[has_lines] = np.nanmin(running[has_lines], axis=1)
+    with np.errstate(invalid="ignore"):
+        metrics["max_deficit"] = np.where(worst < 0, -worst, 0.0)
+        metrics["comeback"] = won & (worst < 0)
+    metrics.loc[~has_lines, "max_deficit"] = np.nan
+
+    # Elo change and pregame expectation
+    team_pre, opp_pre = team_perspective(games, "home_pregame_elo", "away_pregame_elo")
+    team_post, _ = team_perspective(games, "home_postgame_elo", "away_postgame_elo")
+    metrics["elo_change"] = team_post - team_pre
+    expected = 1.0 / (1.0 + np.power(10.0, (opp_pre - team_pre) / 400.0))
+    metrics["pregame_win_prob"] = expected
+    with np.errstate(invalid="ignore"):
+        metrics["won"] = won
+        metrics["upset"] = won & (expected < 0.5)
+
+    return add_rolling_averages(metrics, games)
+
+def add_rolling_averages(metrics, games, window=ROLLING_WINDOW):
+    """Add rolling per-team averages over each team's last `window` games"""
+    order = ["team_id", "year"]
+    if "start_date" in games:
+        metrics["start_date"] = games["start_date"].to_numpy()
+        order.append("start_date")
+    elif "week" in metrics:
+        order.append("week")
+
+    metrics = metrics.sort_values(order, kind="stable")
+    grouped = metrics.groupby("team_id", sort=False)[ROLLING_COLUMNS]
+    rolling = grouped.rolling(window, min_periods=1).mean().reset_index(level=0, drop=True)
+    for column in ROLLING_COLUMNS:
+        metrics[f"{column}_avg{window}"] = rolling[column]
+    return metrics.sort_index()
+
+def save_metrics_to_mongodb(metrics, db):
+    """Replace the game_metrics sidecar collection"""
+    collection = db.game_metrics
+    collection.drop()
+    collection.create_index([("id", 1), ("team_id", 1)])
+    collection.create_index([("team_id", 1), ("year", 1)])
+    documents = metrics.replace({np.nan: None}).to_dict("records")
+    if not documents:
+        return 0
+    result = collection.insert_many(documents)
+    return len(result.inserted_ids)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute per-game advanced stats")
+    parser.add_argument("--input", default="output_directory/games_2000_2024.csv")
+    parser.add_argument("--sink", choices=["csv", "mongo"], default="csv")
+    parser.add_argument("--output", default="output_directory/game_metrics_2000_2024.csv")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.input):
+        print(f"CSV file not found: {args.input}")
+        sys.exit(1)
+
+    print(f"Reading CSV file: {args.input}")
+    games = pd.read_csv(args.input)
+    print(f"Computing metrics for {len(games)} team-game rows...")
+    metrics = compute_game_metrics(games)
+
+    if args.sink == "mongo":
+        db = connect_to_mongodb()
+        inserted = save_metrics_to_mongodb(metrics, db)
+        print(f"Successfully inserted {inserted} game metrics into MongoDB")
+    else:
+        metrics.to_csv(args.output, index=False)
+        print(f"Metrics saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Shape documents before they are inserted into MongoDB.
+
+Drops null, NaN and empty-string fields (and subdocuments left empty by
+that) and converts NumPy scalars to native Python types, so every document
+carries only the keys it has values for. List elements are never dropped,
+since their positions carry meaning. Each call records the
+BSON size before and after shaping so loaders can print a per-collection
+size report.
+"""
+import math
+
+import bson
+import numpy as np
+
+# collection -> {"documents": n, "before": bytes, "after": bytes}
+size_report = {}
+
+
+def is_empty(value):
+    """True for values that should not be stored"""
+    if value is None:
+        return True
+    if isinstance(value, float) and math.isnan(value):
+        return True
+    if isinstance(value, str) and value.strip() == "":
+        return True
+    if isinstance(value, (dict, list)) and not value:
+        return True
+    return False
+
+def to_native(value):
+    """Convert NumPy scalars to the equivalent Python type"""
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+def shape_value(value):
+    value = to_native(value)
+    if isinstance(value, dict):
+        return shape_document(value)
+    if isinstance(value, (list, tuple)):
+        # Keep every element: positions matter (line scores are per quarter)
+        return [shape_value(v) for v in value]
+    return value
+
+def shape_document(document):
+    """Return a copy of the document without empty fields, using native types"""
+    shaped = {}
+    for key, value in document.items():
+        value = shape_value(value)
+        if not is_empty(value):
+            shaped[key] = value
+    return shaped
+
+def bson_size(document):
+    try:
+        return len(bson.encode(document))
+    except Exception:
+        # NumPy scalars cannot be encoded before shaping
+        return len(bson.encode({k: to_native(v) for k, v in document.items()}))
+
+def shape_documents(documents, collection_name):
+    """Shape every document and record the size change for the collection"""
+    shaped = [shape_document(document) for document in documents]
+    entry = size_report.setdefault(collection_name, {"documents": 0, "before": 0, "after": 0})
+    entry["documents"] += len(documents)
+    entry["before"] += sum(bson_size(document) for document in documents)
+    entry["after"] += sum(len(bson.encode(document)) for document in shaped)
+    return shaped
+
+def print_size_report():
+    """Print the before/after BSON size of everything shaped so far"""
+    for collection_name, entry in size_report.items():
+        before, after = entry["before"], entry["after"]
+        saved = (1 - after / before) * 100 if before else 0.0
+        print(f"{collection_name}: {entry['documents']} documents, "
+              f"{before / 1e6:.2f} MB -> {after / 1e6:.2f} MB BSON ({saved:.1f}% smaller)")
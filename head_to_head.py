@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Materialized head-to-head matrix between teams.
+
+Builds one document per (team_id, opp_team_id) pair from the
+team-perspective games table in a single vectorized groupby: wins, losses,
+ties, points for/against, the last meeting and per-decade splits. New
+games are folded in incrementally with $inc upserts, and the
+collection has a unique (team_id, opp_team_id) index for O(1) pair lookup.
+
+Usage:
+    python head_to_head.py
+    python head_to_head.py --incremental --input output_directory/games_2025.csv
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from pymongo import UpdateOne
+
+from mongo_client import connect_to_mongodb
+
+COUNT_COLUMNS = ["games", "wins", "losses", "ties", "points_for", "points_against"]
+
+
+def completed_meetings(games):
+    """
+    Reduce the games table to completed games with team-perspective scores.
+    """
+    is_home = (games["game_location"] == "Home").to_numpy()
+    home_points = pd.to_numeric(games["home_points"], errors="coerce").to_numpy(dtype=float)
+    away_points = pd.to_numeric(games["away_points"], errors="coerce").to_numpy(dtype=float)
+    meetings = pd.DataFrame({
+        "team_id": pd.to_numeric(games["team_id"], errors="coerce"),
+        "opp_team_id": pd.to_numeric(games["opp_team_id"], errors="coerce"),
+        "game_id": games["id"].to_numpy(),
+        "year": games["year"].to_numpy(),
+        "start_date": games["start_date"].astype(str).to_numpy() if "start_date" in games else games["year"].astype(str).to_numpy(),
+        "points_for": np.where(is_home, home_points, away_points),
+        "points_against": np.where(is_home, away_points, home_points),
+    })
+    meetings = meetings.dropna(subset=["team_id", "opp_team_id", "points_for", "points_against"])
+    meetings = meetings.astype({"team_id": "int64", "opp_team_id": "int64"})
+
+    margin = meetings["points_for"] - meetings["points_against"]
+    meetings["games"] = 1
+    meetings["wins"] = (margin > 0).astype("int64")
+    meetings["losses"] = (margin < 0).astype("int64")
+    meetings["ties"] = (margin == 0).astype("int64")
+    meetings["decade"] = (meetings["year"] // 10 * 10).astype(str) + "s"
+    return meetings
+
+def build_matrix(games):
+    """
+    Aggregate every pair in one pass. Returns one row per
+    (team_id, opp_team_id) with totals, last meeting and decade splits.
+    """
+    meetings = completed_meetings(games)
+    keys = ["team_id", "opp_team_id"]
+
+    totals = meetings.groupby(keys)[COUNT_COLUMNS].sum()
+
+    last = meetings.sort_values("start_date").groupby(keys).tail(1).set_index(keys)
+    totals["last_meeting"] = [
+        {"start_date": row.start_date, "game_id": int(row.game_id), "year": int(row.year),
+         "points_for": float(row.points_for), "points_against": float(row.points_against)}
+        for row in last.loc[totals.index].itertuples()
+    ]
+
+    by_decade = meetings.groupby(keys + ["decade"])[COUNT_COLUMNS].sum()
+    decades = {}
+    for (team_id, opp_team_id, decade), row in zip(by_decade.index, by_decade.to_dict("records")):
+        decades.setdefault((team_id, opp_team_id), {})[decade] = row
+    totals["decades"] = [decades[pair] for pair in totals.index]
+    return totals.reset_index()
+
+def matrix_updates(matrix):
+    """
+    Express matrix rows as upserts that add to the stored counts.
+
+    Only games newer than the stored last meeting reach this point (see
+    new_games_only), so the batch's last meeting always replaces the old one.
+    """
+    updates = []
+    for row in matrix.to_dict("records"):
+        increments = {column: row[column] for column in COUNT_COLUMNS}
+        for decade, counts in row["decades"].items():
+            for column in COUNT_COLUMNS:
+                increments[f"decades.{decade}.{column}"] = counts[column]
+        updates.append(UpdateOne(
+            {"team_id": row["team_id"], "opp_team_id": row["opp_team_id"]},
+            {"$inc": increments, "$set": {"last_meeting": row["last_meeting"]}},
+            upsert=True,
+        ))
+    return updates
+
+def new_games_only(games, collection):
+    """
+    Drop games already counted, i.e. on or before the stored last meeting
+    for their pair.
+    """
+    last_dates = {
+        (doc["team_id"], doc["opp_team_id"]): doc["last_meeting"]["start_date"]
+        for doc in collection.find({}, {"_id": 0, "team_id": 1, "opp_team_id": 1,
+                                        "last_meeting.start_date": 1})
+    }
+    if not last_dates:
+        return games
+    dates = games["start_date"].astype(str) if "start_date" in games else games["year"].astype(str)
+    stored = [last_dates.get((t, o), "") for t, o in zip(games["team_id"], games["opp_team_id"])]
+    return games[dates.to_numpy() > np.array(stored, dtype=object)]
+
+def create_indexes(collection):
+    """Index the matrix for pair lookups and per-team scans"""
+    collection.create_index([("team_id", 1), ("opp_team_id", 1)], unique=True)
+
+def save_matrix_to_mongodb(games, db, incremental=False):
+    """Rebuild the head_to_head collection, or fold new games into it"""
+    collection = db.head_to_head
+    if incremental:
+        games = new_games_only(games, collection)
+    else:
+        collection.drop()
+    create_indexes(collection)
+
+    matrix = build_matrix(games)
+    print(f"Writing {len(matrix)} team pairs...")
+    updates = matrix_updates(matrix)
+    if not updates:
+        return 0
+    result = collection.bulk_write(updates, ordered=False)
+    return result.upserted_count + result.modified_count
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the head-to-head matrix between teams")
+    parser.add_argument("--input", default="output_directory/games_2000_2024.csv")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Add newer games to the existing matrix instead of rebuilding it")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.input):
+        print(f"CSV file not found: {args.input}")
+        sys.exit(1)
+
+    print(f"Reading CSV file: {args.input}")
+    games = pd.read_csv(args.input)
+    db = connect_to_mongodb()
+    written = save_matrix_to_mongodb(games, db, incremental=args.incremental)
+    print(f"Successfully wrote {written} head-to-head pairs to MongoDB")
+
+if __name__ == "__main__":
+    main()
@@ -1,70 +1,63 @@
 import pandas as pd
-from pymongo import MongoClient
-import json
 from ast import literal_eval
-from dotenv import load_dotenv
 import os
 import sys
-import certifi
 
-def connect_to_mongodb():
-    """Connect to MongoDB and return database object"""
-    try:
-        load_dotenv()  # Load environment variables from .env file
-        connection_string = os.getenv('MONGO_URI')
-        
-        if not connection_string:
-            raise ValueError("MONGO_URI not found in .env file")
-            
-        print("Attempting to connect to MongoDB...")
-        client = MongoClient(connection_string, tlsCAFile=certifi.where())
-        
-        # Test the connection
-        client.admin.command('ping')
-        print("Successfully connected to MongoDB!")
-        
-        db = client.cfb
-        return db
-    except Exception as e:
-        print(f"Error connecting to MongoDB: {str(e)}")
-        sys.exit(1)
+from dedup import drop_duplicates, ensure_unique_index, upsert_documents
+from document_shaping import print_size_report, shape_documents
+from mongo_client import connect_to_mongodb, print_pool_report
+from parallel_transform import transform_frame
+from schema_registry import report_drift
+from validation import print_validation_report, quarantine, team_keys_from_db, validate_frame
 
 def process_game(row):
-    """Process and convert game data types"""
-    try:
-        # Convert string lists to actual lists
-        for field in ['away_line_scores', 'home_line_scores']:
-            if isinstance(row[field], str):
-                row[field] = literal_eval(row[field])
-        
-        # Convert numeric fields
-        numeric_fields = [
-            'away_id', 'home_id', 'year', 'home_points', 'away_points',
-            'away_pregame_elo', 'away_postgame_elo', 'home_pregame_elo', 
-            'home_postgame_elo', 'venue_id', 'excitement_index',
-            'away_post_win_prob', 'home_post_win_prob'
-        ]
-        
-        for field in numeric_fields:
-            if pd.notna(row[field]):  # Check if value is not NaN
-                if isinstance(row[field], str) and row[field].strip() == '':
-                    row[field] = None
-                elif field in ['away_post_win_prob', 'home_post_win_prob', 'excitement_index']:
-                    row[field] = float(row[field]) if row[field] else None
-                else:
-                    row[field] = int(float(row[field])) if row[field] else None
+    """Process and convert game data types (rows are checked by validation.py first)"""
+    # Convert string lists to actual lists
+    for field in ['away_line_scores', 'home_line_scores']:
+        if isinstance(row.get(field), str):
+            row[field] = literal_eval(row[field])
+    
+    # Convert numeric fields
+    numeric_fields = [
+        'away_id', 'home_id', 'team_id', 'opp_team_id', 'year', 'home_points', 'away_points',
+        'away_pregame_elo', 'away_postgame_elo', 'home_pregame_elo', 
+        'home_postgame_elo', 'venue_id', 'excitement_index',
+        'away_post_win_prob', 'home_post_win_prob'
+    ]
+    
+    for field in numeric_fields:
+        if pd.notna(row.get(field)):  # Check if value is present and not NaN
+            if isinstance(row[field], str) and row[field].strip() == '':
+                row[field] = None
+            elif field in ['away_post_win_prob', 'home_post_win_prob', 'excitement_index']:
+                row[field] = float(row[field]) if row[field] else None
+            else:
+                row[field] = int(float(row[field])) if row[field] else None
+    
+    # Convert boolean fields
+    bool_fields = ['conference_game', 'start_time_tbd', 'neutral_site', 'completed']
+    for field in bool_fields:
+        if isinstance(row.get(field), str):
+            row[field] = row[field].lower() == 'true'
         
-        # Convert boolean fields
-        bool_fields = ['conference_game', 'start_time_tbd', 'neutral_site', 'completed']
-        for field in bool_fields:
-            if isinstance(row[field], str):
-                row[field] = row[field].lower() == 'true'
-            
-        return row
-    except Exception as e:
-        print(f"Error processing game: {row}")
-        print(f"Error: {e}")
-        return None
+    return row
+
+def create_indexes(collection):
+    """Recreate the indexes used by common games queries"""
+    # Drop existing indexes if they exist
+    collection.drop_indexes()
+
+    print("Creating indexes...")
+    # Unique natural key, so reloading replaces documents instead of duplicating them
+    ensure_unique_index(collection, "games")
+    # Create indexes for common queries
+    collection.create_index([("year", 1)])
+    collection.create_index([("home_id", 1), ("year", 1)])
+    collection.create_index([("away_id", 1), ("year", 1)])
+    collection.create_index([("conference", 1), ("year", 1)])
+    # Team-perspective lookups (team seasons and head-to-head history)
+    collection.create_index([("team_id", 1), ("year", 1)])
+    collection.create_index([("team_id", 1), ("opp_team_id", 1)])
 
 def load_games_to_mongodb(csv_path, db):
     """Load games from CSV to MongoDB"""
@@ -76,49 +69,49 @@ def load_games_to_mongodb(csv_path, db):
         print(f"Reading CSV file: {csv_path}")
         df = pd.read_csv(csv_path)
         
-        # Convert DataFrame to list of dictionaries
-        games = df.to_dict('records')
+        # CSV parsing loses the API types, so only compare the column set
+        # (every CSV row has the same columns, so one row is enough)
+        report_drift("games", df.head(1).to_dict('records'), check_types=False)
+
+        # Check every rule column-wise and set failing rows aside in bulk
+        df, rejected = validate_frame(df, "games", team_keys_from_db(db))
+        quarantine(rejected, "games", db)
         
-        print(f"Processing {len(games)} games...")
-        # Process each game
-        processed_games = []
-        for game in games:
-            processed_game = process_game(game)
-            if processed_game:
-                processed_games.append(processed_game)
+        print(f"Processing {len(df)} games...")
+        # Process each game, one season per core on large files
+        processed_games = transform_frame(df, process_game)
         
         # Create collection and insert records
         collection = db.games
         
-        # Drop existing indexes if they exist
-        collection.drop_indexes()
-        
-        print("Creating indexes...")
-        # Create indexes for common queries
-        collection.create_index([("year", 1)])
-        collection.create_index([("home_id", 1), ("year", 1)])
-        collection.create_index([("away_id", 1), ("year", 1)])
-        collection.create_index([("conference", 1), ("year", 1)])
+        create_indexes(collection)
         
-        print(f"Inserting {len(processed_games)} games...")
-        # Insert games in bulk
+        # Drop rows repeated on the natural key (e.g. re-fetched seasons)
+        processed_games = drop_duplicates(processed_games, "games")
+
+        # Drop empty fields so documents only carry real values
+        processed_games = shape_documents(processed_games, "games")
+
+        print(f"Writing {len(processed_games)} games...")
+        # Upsert on the natural key in bulk
         if processed_games:
-            result = collection.insert_many(processed_games)
-            return len(result.inserted_ids)
+            return upsert_documents(collection, processed_games, "games")
         return 0
     except Exception as e:
         print(f"Error loading games to MongoDB: {str(e)}")
         sys.exit(1)
 
-def main():
+def main(csv_path="output_directory/games_2000_2024.csv"):
     # Connect to MongoDB
     db = connect_to_mongodb()
     
     # Load games
-    csv_path = "output_directory/games_2000_2024.csv"
     inserted_count = load_games_to_mongodb(csv_path, db)
     
-    print(f"Successfully inserted {inserted_count} games into MongoDB")
+    print(f"Successfully loaded {inserted_count} games into MongoDB")
+    print_size_report()
+    print_validation_report()
+    print_pool_report()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
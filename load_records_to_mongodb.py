@@ -1,53 +1,41 @@
 import pandas as pd
-from pymongo import MongoClient
-import json
 from ast import literal_eval
-from dotenv import load_dotenv
 import os
 import sys
-import certifi  # Add this import
 
-def connect_to_mongodb():
-    """Connect to MongoDB and return database object"""
-    try:
-        load_dotenv()  # Load environment variables from .env file
-        connection_string = os.getenv('MONGO_URI')
-        
-        if not connection_string:
-            raise ValueError("MONGO_URI not found in .env file")
-            
-        print("Attempting to connect to MongoDB...")
-        # Use certifi's certificate bundle for SSL verification
-        client = MongoClient(connection_string, tlsCAFile=certifi.where())
-        
-        # Test the connection
-        client.admin.command('ping')
-        print("Successfully connected to MongoDB!")
-        
-        db = client.cfb
-        return db
-    except Exception as e:
-        print(f"Error connecting to MongoDB: {str(e)}")
-        sys.exit(1)
+from dedup import drop_duplicates, ensure_unique_index, upsert_documents
+from document_shaping import print_size_report, shape_documents
+from mongo_client import connect_to_mongodb, print_pool_report
+from parallel_transform import transform_frame
+from schema_registry import report_drift
+from validation import print_validation_report, quarantine, team_keys_from_db, validate_frame
 
 def process_record(row):
     """Convert string representations of dictionaries to actual dictionaries"""
-    try:
-        # Convert string representations of dictionaries to actual dictionaries
-        for field in ['conferenceGames', 'homeGames', 'awayGames', 'total']:
-            if isinstance(row[field], str):
-                row[field] = literal_eval(row[field])
-        
-        # Convert to proper types
-        row['year'] = int(row['year'])
-        row['teamId'] = int(row['teamId'])
+    # Convert string representations of dictionaries to actual dictionaries
+    for field in ['conferenceGames', 'homeGames', 'awayGames', 'total']:
+        if isinstance(row.get(field), str):
+            row[field] = literal_eval(row[field])
+    
+    # Convert to proper types (rows are checked by validation.py first)
+    row['year'] = int(row['year'])
+    row['teamId'] = int(row['teamId'])
+    if row.get('expectedWins') is not None:
         row['expectedWins'] = float(row['expectedWins'])
-        
-        return row
-    except Exception as e:
-        print(f"Error processing row: {row}")
-        print(f"Error: {e}")
-        return None
+    
+    return row
+
+def create_indexes(collection):
+    """Recreate the indexes used by common records queries"""
+    # Drop existing indexes if they exist
+    collection.drop_indexes()
+
+    print("Creating indexes...")
+    # Unique natural key, so reloading replaces documents instead of duplicating them
+    ensure_unique_index(collection, "records")
+    # Create indexes for common queries
+    collection.create_index([("year", 1), ("teamId", 1)])
+    collection.create_index([("conference", 1), ("year", 1)])
 
 def load_records_to_mongodb(csv_path, db):
     """Load records from CSV to MongoDB"""
@@ -59,47 +47,49 @@ def load_records_to_mongodb(csv_path, db):
         print(f"Reading CSV file: {csv_path}")
         df = pd.read_csv(csv_path)
         
-        # Convert DataFrame to list of dictionaries
-        records = df.to_dict('records')
+        # CSV parsing loses the API types, so only compare the column set
+        # (every CSV row has the same columns, so one row is enough)
+        report_drift("records", df.head(1).to_dict('records'), check_types=False)
+
+        # Check every rule column-wise and set failing rows aside in bulk
+        df, rejected = validate_frame(df, "records", team_keys_from_db(db))
+        quarantine(rejected, "records", db)
         
-        print(f"Processing {len(records)} records...")
-        # Process each record
-        processed_records = []
-        for record in records:
-            processed_record = process_record(record)
-            if processed_record:
-                processed_records.append(processed_record)
+        print(f"Processing {len(df)} records...")
+        # Process each record, one season per core on large files
+        processed_records = transform_frame(df, process_record)
         
         # Create collection and insert records
         collection = db.records
         
-        # Drop existing indexes if they exist
-        collection.drop_indexes()
-        
-        print("Creating indexes...")
-        # Create indexes for common queries
-        collection.create_index([("year", 1), ("teamId", 1)])
-        collection.create_index([("conference", 1), ("year", 1)])
+        create_indexes(collection)
         
-        print(f"Inserting {len(processed_records)} records...")
-        # Insert records in bulk
+        # Drop rows repeated on the natural key (e.g. re-fetched seasons)
+        processed_records = drop_duplicates(processed_records, "records")
+
+        # Drop empty fields so documents only carry real values
+        processed_records = shape_documents(processed_records, "records")
+
+        print(f"Writing {len(processed_records)} records...")
+        # Upsert on the natural key in bulk
         if processed_records:
-            result = collection.insert_many(processed_records)
-            return len(result.inserted_ids)
+            return upsert_documents(collection, processed_records, "records")
         return 0
     except Exception as e:
         print(f"Error loading records to MongoDB: {str(e)}")
         sys.exit(1)
 
-def main():
+def main(csv_path="output_directory/records_2000_2024.csv"):
     # Connect to MongoDB
     db = connect_to_mongodb()
     
     # Load records
-    csv_path = "output_directory/records_2000_2024.csv"
     inserted_count = load_records_to_mongodb(csv_path, db)
     
-    print(f"Successfully inserted {inserted_count} records into MongoDB")
+    print(f"Successfully loaded {inserted_count} records into MongoDB")
+    print_size_report()
+    print_validation_report()
+    print_pool_report()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -1,46 +1,34 @@
 import pandas as pd
-from pymongo import MongoClient
-import json
-from dotenv import load_dotenv
 import os
 import sys
-import certifi
 
-def connect_to_mongodb():
-    """Connect to MongoDB and return database object"""
-    try:
-        load_dotenv()  # Load environment variables from .env file
-        connection_string = os.getenv('MONGO_URI')
-        
-        if not connection_string:
-            raise ValueError("MONGO_URI not found in .env file")
-            
-        print("Attempting to connect to MongoDB...")
-        # Use certifi's certificate bundle for SSL verification
-        client = MongoClient(connection_string, tlsCAFile=certifi.where())
-        
-        # Test the connection
-        client.admin.command('ping')
-        print("Successfully connected to MongoDB!")
-        
-        db = client.cfb
-        return db
-    except Exception as e:
-        print(f"Error connecting to MongoDB: {str(e)}")
-        sys.exit(1)
+from dedup import drop_duplicates, ensure_unique_index, upsert_documents
+from document_shaping import print_size_report, shape_documents
+from mongo_client import connect_to_mongodb, print_pool_report
+from parallel_transform import transform_frame
+from schema_registry import report_drift
+from validation import print_validation_report, quarantine, team_keys_from_db, validate_frame
 
 def process_stat(row):
     """Process stat data and convert types as needed"""
-    try:
-        # Convert to proper types
-        row['year'] = int(row['year'])
-        row['statValue'] = float(row['statValue'])
-        
-        return row
-    except Exception as e:
-        print(f"Error processing row: {row}")
-        print(f"Error: {e}")
-        return None
+    # Convert to proper types (rows are checked by validation.py first)
+    row['year'] = int(row['year'])
+    row['statValue'] = float(row['statValue'])
+    
+    return row
+
+def create_indexes(collection):
+    """Recreate the indexes used by common season stats queries"""
+    # Drop existing indexes if they exist
+    collection.drop_indexes()
+
+    print("Creating indexes...")
+    # Unique natural key, so reloading replaces documents instead of duplicating them
+    ensure_unique_index(collection, "teamstats")
+    # Create indexes for common queries
+    collection.create_index([("year", 1)])  # Index on year
+    collection.create_index([("team", 1)])  # Index on team
+    collection.create_index([("category", 1)])  # Index on category
 
 def load_stats_to_mongodb(csv_path, db):
     """Load season stats from CSV to MongoDB"""
@@ -52,48 +40,49 @@ def load_stats_to_mongodb(csv_path, db):
         print(f"Reading CSV file: {csv_path}")
         df = pd.read_csv(csv_path)
         
-        # Convert DataFrame to list of dictionaries
-        stats = df.to_dict('records')
+        # CSV parsing loses the API types, so only compare the column set
+        # (every CSV row has the same columns, so one row is enough)
+        report_drift("teamstats", df.head(1).to_dict('records'), check_types=False)
+
+        # Check every rule column-wise and set failing rows aside in bulk
+        df, rejected = validate_frame(df, "teamstats", team_keys_from_db(db))
+        quarantine(rejected, "teamstats", db)
         
-        print(f"Processing {len(stats)} statistics...")
-        # Process each stat
-        processed_stats = []
-        for stat in stats:
-            processed_stat = process_stat(stat)
-            if processed_stat:
-                processed_stats.append(processed_stat)
+        print(f"Processing {len(df)} statistics...")
+        # Process each stat, one season per core on large files
+        processed_stats = transform_frame(df, process_stat)
         
         # Create collection and insert stats
         collection = db.teamstats 
         
-        # Drop existing indexes if they exist
-        collection.drop_indexes()
-        
-        print("Creating indexes...")
-        # Create indexes for common queries
-        collection.create_index([("year", 1)])  # Index on year
-        collection.create_index([("team", 1)])  # Index on team
-        collection.create_index([("category", 1)])  # Index on category
+        create_indexes(collection)
         
-        print(f"Inserting {len(processed_stats)} statistics...")
-        # Insert stats in bulk
+        # Drop rows repeated on the natural key (e.g. re-fetched seasons)
+        processed_stats = drop_duplicates(processed_stats, "teamstats")
+
+        # Drop empty fields so documents only carry real values
+        processed_stats = shape_documents(processed_stats, "teamstats")
+
+        print(f"Writing {len(processed_stats)} statistics...")
+        # Upsert on the natural key in bulk
         if processed_stats:
-            result = collection.insert_many(processed_stats)
-            return len(result.inserted_ids)
+            return upsert_documents(collection, processed_stats, "teamstats")
         return 0
     except Exception as e:
         print(f"Error loading stats to MongoDB: {str(e)}")
         sys.exit(1)
 
-def main():
+def main(csv_path="output_directory/season_stats_2000_2024.csv"):
     # Connect to MongoDB
     db = connect_to_mongodb()
     
     # Load stats
-    csv_path = "output_directory/season_stats_2000_2024.csv"
     inserted_count = load_stats_to_mongodb(csv_path, db)
     
-    print(f"Successfully inserted {inserted_count} statistics into MongoDB")
+    print(f"Successfully loaded {inserted_count} statistics into MongoDB")
+    print_size_report()
+    print_validation_report()
+    print_pool_report()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -1,68 +1,44 @@
 import pandas as pd
-from pymongo import MongoClient
-import json
-from dotenv import load_dotenv
 import os
 import sys
-import certifi
 import csv
+from ast import literal_eval
 
-def connect_to_mongodb():
-    """Connect to MongoDB and return database object"""
-    try:
-        load_dotenv()  # Load environment variables from .env file
-        connection_string = os.getenv('MONGO_URI')
-        
-        if not connection_string:
-            raise ValueError("MONGO_URI not found in .env file")
-            
-        print("Attempting to connect to MongoDB...")
-        # Use certifi's certificate bundle for SSL verification
-        client = MongoClient(connection_string, tlsCAFile=certifi.where())
-        
-        # Test the connection
-        client.admin.command('ping')
-        print("Successfully connected to MongoDB!")
-        
-        db = client.cfb
-        return db
-    except Exception as e:
-        print(f"Error connecting to MongoDB: {str(e)}")
-        sys.exit(1)
+from dedup import drop_duplicates, ensure_unique_index, upsert_documents
+from document_shaping import print_size_report, shape_documents
+from mongo_client import connect_to_mongodb, print_pool_report
+from schema_registry import report_drift
+from validation import print_validation_report, quarantine, validate_frame
 
 def process_team(row):
     """Process team data and convert types as needed"""
-    try:
-        processed_row = {}
-        for key, value in row.items():
-            if key == 'logos' and isinstance(value, str):
-                # Take only the first logo from the list
-                try:
-                    logos_list = eval(value) if value else []
-                    processed_row['logo'] = str(logos_list[0]) if logos_list else ""
-                except:
-                    processed_row['logo'] = ""
-            elif key == 'location' and isinstance(value, str):
-                # Unpack location dictionary into separate fields
-                try:
-                    location_dict = eval(value) if value else {}
-                    for loc_key, loc_value in location_dict.items():
-                        # Create new fields with location_ prefix
-                        processed_row[f'location_{loc_key}'] = str(loc_value) if pd.notna(loc_value) else ""
-                except:
-                    # If there's an error, create empty location fields
-                    processed_row['location_latitude'] = ""
-                    processed_row['location_longitude'] = ""
-                    processed_row['location_venue_id'] = ""
-            elif key != 'location':  # Skip the original location field
-                # Convert everything else to string, handling None/NaN
-                processed_row[key] = str(value) if pd.notna(value) else ""
-        
-        return processed_row
-    except Exception as e:
-        print(f"Error processing row: {row}")
-        print(f"Error: {e}")
-        return None
+    processed_row = {}
+    for key, value in row.items():
+        if key == 'logos' and isinstance(value, str):
+            # Take only the first logo from the list
+            try:
+                logos_list = literal_eval(value) if value else []
+                processed_row['logo'] = str(logos_list[0]) if logos_list else None
+            except (ValueError, SyntaxError):
+                processed_row['logo'] = None
+        elif key == 'location' and isinstance(value, str):
+            # Keep location as a subdocument with its native types
+            try:
+                processed_row['location'] = literal_eval(value) if value else None
+            except (ValueError, SyntaxError):
+                processed_row['location'] = None
+        elif key != 'location':
+            # Keep native values, with NaN as None so it can be dropped
+            processed_row[key] = value if pd.notna(value) else None
+    
+    return processed_row
+
+def flatten_location(team):
+    """Expand the location subdocument into location_ prefixed fields"""
+    flat = {k: v for k, v in team.items() if k != 'location'}
+    for loc_key, loc_value in (team.get('location') or {}).items():
+        flat[f'location_{loc_key}'] = loc_value
+    return flat
 
 def save_processed_csv(processed_teams, output_dir="cleaned_data"):
     """Save processed teams data to a new CSV file"""
@@ -73,6 +49,9 @@ def save_processed_csv(processed_teams, output_dir="cleaned_data"):
         # Define the output path
         csv_path = os.path.join(output_dir, "teams_cleaned.csv")
         
+        # The CSV keeps the flat location_ columns
+        processed_teams = [flatten_location(team) for team in processed_teams]
+
         # Get all possible headers from the processed data
         headers = set()
         for team in processed_teams:
@@ -91,6 +70,18 @@ def save_processed_csv(processed_teams, output_dir="cleaned_data"):
         print(f"Error saving processed CSV: {str(e)}")
         sys.exit(1)
 
+def create_indexes(collection):
+    """Recreate the indexes used by common teams queries"""
+    # Drop existing indexes if they exist
+    collection.drop_indexes()
+
+    print("Creating indexes...")
+    # Unique natural key, so reloading replaces documents instead of duplicating them
+    ensure_unique_index(collection, "teams")
+    # Create indexes for common queries
+    collection.create_index([("id", 1)])  # Index on team ID
+    collection.create_index([("conference", 1)])  # Index on conference
+
 def load_teams_to_mongodb(csv_path, db):
     """Load teams from CSV to MongoDB"""
     try:
@@ -100,17 +91,19 @@ def load_teams_to_mongodb(csv_path, db):
             
         print(f"Reading CSV file: {csv_path}")
         df = pd.read_csv(csv_path)
+
+        # Check every rule column-wise and set failing rows aside in bulk
+        df, rejected = validate_frame(df, "teams")
+        quarantine(rejected, "teams", db)
         
         # Convert DataFrame to list of dictionaries
         teams = df.to_dict('records')
+        # CSV parsing loses the API types, so only compare the column set
+        report_drift("teams", teams, check_types=False)
         
         print(f"Processing {len(teams)} teams...")
         # Process each team
-        processed_teams = []
-        for team in teams:
-            processed_team = process_team(team)
-            if processed_team:
-                processed_teams.append(processed_team)
+        processed_teams = [process_team(team) for team in teams]
         
         # Save processed data to CSV
         save_processed_csv(processed_teams)
@@ -118,33 +111,34 @@ def load_teams_to_mongodb(csv_path, db):
         # Create collection and insert teams
         collection = db.teams
         
-        # Drop existing indexes if they exist
-        collection.drop_indexes()
-        
-        print("Creating indexes...")
-        # Create indexes for common queries
-        collection.create_index([("id", 1)])  # Index on team ID
-        collection.create_index([("conference", 1)])  # Index on conference
+        create_indexes(collection)
         
-        print(f"Inserting {len(processed_teams)} teams...")
-        # Insert teams in bulk
+        # Drop rows repeated on the natural key (e.g. re-fetched seasons)
+        processed_teams = drop_duplicates(processed_teams, "teams")
+
+        # Drop empty fields so documents only carry real values
+        processed_teams = shape_documents(processed_teams, "teams")
+
+        print(f"Writing {len(processed_teams)} teams...")
+        # Upsert on the natural key in bulk
         if processed_teams:
-            result = collection.insert_many(processed_teams)
-            return len(result.inserted_ids)
+            return upsert_documents(collection, processed_teams, "teams")
         return 0
     except Exception as e:
         print(f"Error loading teams to MongoDB: {str(e)}")
         sys.exit(1)
 
-def main():
+def main(csv_path="output_directory/teams.csv"):
     # Connect to MongoDB
     db = connect_to_mongodb()
     
     # Load teams
-    csv_path = "output_directory/teams.csv"
     inserted_count = load_teams_to_mongodb(csv_path, db)
     
-    print(f"Successfully inserted {inserted_count} teams into MongoDB")
+    print(f"Successfully loaded {inserted_count} teams into MongoDB")
+    print_size_report()
+    print_validation_report()
+    print_pool_report()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,176 @@
+"""
+Shared MongoDB connection for every loader.
+
+One MongoClient (and so one TLS handshake and one warm connection pool) is
+created per process and reused by all loaders. Pool size, wire compression,
+write concern and retryable writes are tuned for bulk loading and can be
+overridden from the environment:
+
+    MONGO_URI               connection string (required)
+    MONGO_MAX_POOL_SIZE     maximum pooled connections (default 20)
+    MONGO_COMPRESSORS       e.g. "zstd,snappy,zlib" (default: installed codecs)
+    MONGO_WRITE_CONCERN     w value for bulk inserts (default 1)
+
+certifi's CA bundle is only passed for TLS connections (mongodb+srv://
+URIs, or tls=true/ssl=true in the URI), since pymongo turns TLS on whenever
+a CA file is given and a default local mongod does not speak it.
+"""
+import os
+import sys
+import threading
+import time
+from urllib.parse import parse_qs
+
+import certifi
+from dotenv import load_dotenv
+from pymongo import MongoClient, monitoring
+
+_client = None
+_client_lock = threading.Lock()
+
+
+class PoolWaitListener(monitoring.ConnectionPoolListener):
+    """Records how long operations wait to check a connection out of the pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = threading.local()
+        self.checkouts = 0
+        self.failed_checkouts = 0
+        self.connections_created = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def connection_check_out_started(self, event):
+        self._started.at = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        # pymongo >= 4.7 reports the duration itself
+        wait = getattr(event, "duration", None)
+        if wait is None:
+            wait = time.perf_counter() - getattr(self._started, "at", time.perf_counter())
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.failed_checkouts += 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.connections_created += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        pass
+
+    def connection_checked_in(self, event):
+        pass
+
+
+pool_listener = PoolWaitListener()
+
+
+def available_compressors():
+    """Wire compressors to offer the server, best first"""
+    configured = os.getenv("MONGO_COMPRESSORS")
+    if configured:
+        return configured
+    compressors = []
+    try:
+        import zstandard  # noqa: F401
+        compressors.append("zstd")
+    except ImportError:
+        pass
+    try:
+        import snappy  # noqa: F401
+        compressors.append("snappy")
+    except ImportError:
+        pass
+    compressors.append("zlib")
+    return ",".join(compressors)
+
+def uses_tls(connection_string):
+    """True for mongodb+srv:// URIs (TLS by default) or URIs that turn TLS on"""
+    options = {key.lower(): values[-1].lower()
+               for key, values in parse_qs(connection_string.partition("?")[2]).items()}
+    tls = options.get("tls", options.get("ssl"))
+    if tls is not None:
+        return tls == "true"
+    return connection_string.startswith("mongodb+srv://")
+
+def client_options(connection_string):
+    """Options used for the shared client"""
+    write_concern = os.getenv("MONGO_WRITE_CONCERN", "1")
+    options = {
+        "maxPoolSize": int(os.getenv("MONGO_MAX_POOL_SIZE", "20")),
+        "minPoolSize": 1,
+        "compressors": available_compressors(),
+        "w": int(write_concern) if write_concern.isdigit() else write_concern,
+        "retryWrites": True,
+        "event_listeners": [pool_listener],
+    }
+    if uses_tls(connection_string) and "tlscafile=" not in connection_string.lower():
+        options["tlsCAFile"] = certifi.where()
+    return options
+
+def get_client():
+    """Return the process-wide MongoClient, creating and pinging it on first use"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            load_dotenv()  # Load environment variables from .env file
+            connection_string = os.getenv('MONGO_URI')
+
+            if not connection_string:
+                raise ValueError("MONGO_URI not found in .env file")
+
+            print("Attempting to connect to MongoDB...")
+            client = MongoClient(connection_string, **client_options(connection_string))
+
+            # Test the connection
+            client.admin.command('ping')
+            print("Successfully connected to MongoDB!")
+            _client = client
+        return _client
+
+def connect_to_mongodb():
+    """Connect to MongoDB and return database object"""
+    try:
+        return get_client().cfb
+    except Exception as e:
+        print(f"Error connecting to MongoDB: {str(e)}")
+        sys.exit(1)
+
+def pool_report():
+    """Summary of connection pool usage for the run report"""
+    return {
+        "checkouts": pool_listener.checkouts,
+        "failed_checkouts": pool_listener.failed_checkouts,
+        "connections_created": pool_listener.connections_created,
+        "total_wait_ms": round(pool_listener.total_wait * 1000, 1),
+        "max_wait_ms": round(pool_listener.max_wait * 1000, 1),
+    }
+
+def print_pool_report():
+    """Print the connection pool usage summary"""
+    report = pool_report()
+    print(f"Connection pool: {report['checkouts']} checkouts, "
+          f"{report['connections_created']} connections created, "
+          f"wait {report['total_wait_ms']} ms total / {report['max_wait_ms']} ms max")
@@ -0,0 +1,75 @@
+"""
+Multi-core execution of the per-row transform functions.
+
+The loaders' process_* functions are pure functions of one row, so a
+dataset can be split by season and each season transformed in its own
+process. Seasons are shipped to workers as Arrow IPC buffers when pyarrow
+is installed (columnar and compact to send, and read without copying on
+the worker side), otherwise as pickled rows. Results are put back in the
+original row order, so the output is the same whichever path or worker
+count was used.
+
+Small inputs and single-core machines run serially, since starting a pool
+costs more than it saves there. Set TRANSFORM_WORKERS to cap the number of
+processes (1 turns the pool off).
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# Below this many rows per worker the pool is not worth starting
+MIN_ROWS_PER_WORKER = 2000
+
+
+def default_workers():
+    workers = os.getenv("TRANSFORM_WORKERS")
+    if workers:
+        return max(1, int(workers))
+    return os.cpu_count() or 1
+
+def encode_shard(shard):
+    """Serialize one season: Arrow IPC bytes when possible, else plain rows"""
+    try:
+        import pyarrow as pa
+        table = pa.Table.from_pandas(shard, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return "arrow", sink.getvalue().to_pybytes()
+    except Exception:
+        # No pyarrow, or a column Arrow cannot type (mixed objects)
+        return "rows", shard.to_dict("records")
+
+def decode_shard(kind, payload):
+    if kind == "rows":
+        return payload
+    import pyarrow as pa
+    table = pa.ipc.open_stream(pa.py_buffer(payload)).read_all()
+    return table.to_pandas().to_dict("records")
+
+def transform_shard(process, kind, payload):
+    """Worker entry point; keeps None results so positions still line up"""
+    return [process(row) for row in decode_shard(kind, payload)]
+
+def transform_frame(df, process, key="year", workers=None):
+    """
+    Apply `process` to every row of `df`, in parallel by season when the
+    frame is large enough. Rows for which `process` returns None are dropped.
+    Returns the processed rows in the original row order.
+    """
+    workers = workers or default_workers()
+    workers = min(workers, len(df) // MIN_ROWS_PER_WORKER)
+    if workers <= 1 or key not in df.columns:
+        return [row for row in map(process, df.to_dict("records")) if row]
+
+    print(f"Transforming {len(df)} rows on {workers} processes...")
+    positions = []
+    results = [None] * len(df)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = []
+        for rows_at in df.groupby(key, dropna=False).indices.values():
+            positions.append(rows_at)
+            futures.append(executor.submit(transform_shard, process, *encode_shard(df.iloc[rows_at])))
+        for rows_at, future in zip(positions, futures):
+            for position, row in zip(rows_at, future.result()):
+                results[position] = row
+    return [row for row in results if row]
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Concurrent, year-partitioned fetching under one global rate budget.
+
+Every (endpoint, year) request is an independent unit of work. Units run on
+a thread pool, but each one first takes a slot from a shared rate limiter,
+so the API sees at most REQUESTS_PER_SECOND requests no matter how many
+endpoints are refreshed at once. Results are merged back in year order.
+
+Usage:
+    python partitioned_fetch.py                 refresh games, records and season stats
+    python partitioned_fetch.py --start 2020 --rate 2 --workers 4
+
+Output files are named after the seasons fetched (games_2020_2024.csv), so
+refreshing a few seasons does not overwrite the full-history files.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Global request budget shared by every fetcher in the process
+REQUESTS_PER_SECOND = 4.0
+
+# Requests allowed in flight at once
+MAX_WORKERS = 8
+
+
+class RateLimiter:
+    """Spaces calls to acquire() at least 1/rate seconds apart across threads"""
+
+    def __init__(self, rate=REQUESTS_PER_SECOND):
+        self.interval = 1.0 / rate
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+default_limiter = RateLimiter()
+
+
+def fetch_partitioned(units, limiter=None, max_workers=MAX_WORKERS):
+    """
+    Run (endpoint, year, fetch) units concurrently.
+    Returns {endpoint: [(year, payload), ...]} with each list in year order.
+    """
+    limiter = limiter or default_limiter
+
+    def run(unit):
+        _, year, fetch = unit
+        limiter.acquire()
+        return fetch(year)
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(run, unit): unit for unit in units}
+        for future in as_completed(futures):
+            endpoint, year, _ = futures[future]
+            try:
+                payload = future.result()
+            except Exception as err:
+                print(f"Error fetching {endpoint} for {year}: {err}")
+                payload = None
+            results.setdefault(endpoint, {})[year] = payload
+    return {endpoint: sorted(by_year.items()) for endpoint, by_year in results.items()}
+
+def fetch_years(fetch, years, limiter=None, max_workers=MAX_WORKERS):
+    """Fetch one endpoint for every year; returns [(year, payload), ...] in year order"""
+    units = [("data", year, fetch) for year in years]
+    return fetch_partitioned(units, limiter, max_workers).get("data", [])
+
+def refresh_season_datasets(years, output_dir="output_directory", limiter=None, max_workers=MAX_WORKERS):
+    """
+    Refresh games, records and season stats together. All three endpoints
+    share the rate budget, so the refresh takes about as long as the
+    slowest requests allow rather than three sequential loops.
+    """
+    import dataGetgames
+    import dataGetrecords
+    import dataGetteamstats
+    from api_config import season_csv_name
+
+    api_key = dataGetteamstats.get_api_key()
+    units = []
+    for year in years:
+        units.append(("games", year, dataGetgames.fetch_games_for_year))
+        units.append(("records", year, dataGetrecords.fetch_records_for_year))
+        units.append(("teamstats", year, lambda y: dataGetteamstats.fetch_season_stats(y, api_key)))
+
+    start = time.perf_counter()
+    results = fetch_partitioned(units, limiter, max_workers)
+    print(f"Fetched {len(units)} partitions in {time.perf_counter() - start:.1f}s")
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    all_games = []
+    for year, games in results.get("games", []):
+        if games:
+            all_games.extend(dataGetgames.unpivot_games(games, year))
+    dataGetgames.save_to_csv(all_games, os.path.join(output_dir, season_csv_name("games", years)))
+
+    all_records = []
+    for year, records in results.get("records", []):
+        if records:
+            all_records.extend(records)
+    dataGetrecords.save_to_csv(all_records, os.path.join(output_dir, season_csv_name("records", years)))
+
+    all_stats = []
+    for year, stats in results.get("teamstats", []):
+        if stats:
+            all_stats.extend(dataGetteamstats.tag_year(stats, year))
+    dataGetteamstats.save_to_csv(all_stats, os.path.join(output_dir, season_csv_name("season_stats", years)))
+
+    return {"games": len(all_games), "records": len(all_records), "teamstats": len(all_stats)}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Refresh all season-level datasets concurrently")
+    parser.add_argument("--start", type=int, default=2000, help="First season (inclusive)")
+    parser.add_argument("--end", type=int, default=2024, help="Last season (inclusive)")
+    parser.add_argument("--output-dir", default="output_directory")
+    parser.add_argument("--rate", type=float, help="Requests per second across all endpoints")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="Requests in flight at once")
+    args = parser.parse_args(argv)
+
+    try:
+        import dataGetteamstats
+        dataGetteamstats.get_api_key()
+    except ValueError as err:
+        print(f"Error: {err}")
+        sys.exit(1)
+
+    limiter = RateLimiter(args.rate) if args.rate else None
+    years = range(args.start, args.end + 1)
+    counts = refresh_season_datasets(years, args.output_dir, limiter, args.workers)
+    for name, count in counts.items():
+        print(f"{name}: {count} rows")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Optional profiling for any pipeline stage.
+
+Wrap a stage in profile_stage() to record one of:
+
+    cprofile  deterministic profile, saved as <stage>-<run_id>.prof
+              (open with snakeviz, or convert with flameprof / gprof2dot)
+    sample    low-overhead sampling of every thread's stack, saved as
+              <stage>-<run_id>.folded in collapsed-stack format
+              (feed to flamegraph.pl or load into speedscope)
+    memory    tracemalloc allocation snapshot, saved as
+              <stage>-<run_id>.tracemalloc plus a top-allocations summary
+
+cprofile covers work done off the main thread (asyncio.to_thread workers,
+the partitioned-fetch pool), not just the event loop waiting. From Python
+3.12 cProfile runs on sys.monitoring and one profiler sees every thread.
+Before that it only sees the thread that enabled it, so a profiler is
+installed in every thread started while the stage runs and they are merged
+into one .prof; threads that already existed are not covered there, while
+"sample" mode sees every thread on any version. Process pools cannot be profiled
+from here, so parallel_transform runs in-process while any mode is active.
+
+With no mode, profile_stage() does nothing, so stages pay no cost unless
+profiling was requested.
+"""
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+PROFILE_MODES = ("cprofile", "sample", "memory")
+
+# Before 3.12 each thread needs its own cProfile profiler; from 3.12 only one
+# can be active per interpreter and it already covers all threads
+PER_THREAD_PROFILERS = sys.version_info < (3, 12)
+
+# Seconds between stack samples in "sample" mode
+SAMPLE_INTERVAL = 0.005
+
+# Frames kept per allocation traceback in "memory" mode
+TRACEMALLOC_FRAMES = 25
+
+
+def new_run_id():
+    """Identifier shared by every profile file written in one run"""
+    return time.strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}"
+
+
+class StackSampler(threading.Thread):
+    """Background thread that counts the call stacks of all other threads"""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        super().__init__(name="stack-sampler", daemon=True)
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        own_id = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def write_folded(self, path):
+        """Write samples in collapsed-stack format: 'frame;frame;frame count'"""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+@contextmanager
+def profile_stage(stage, mode=None, run_id=None, output_dir="profiles"):
+    """Profile the enclosed block when a mode is given; otherwise a no-op"""
+    if not mode:
+        yield
+        return
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Unknown profile mode: {mode} (choose from {', '.join(PROFILE_MODES)})")
+
+    os.makedirs(output_dir, exist_ok=True)
+    base = os.path.join(output_dir, f"{stage}-{run_id or new_run_id()}")
+
+    # Keep transform work in this process, where the profilers can see it
+    previous_workers = os.environ.get("TRANSFORM_WORKERS")
+    os.environ["TRANSFORM_WORKERS"] = "1"
+    try:
+        with _profile(mode, base):
+            yield
+    finally:
+        if previous_workers is None:
+            os.environ.pop("TRANSFORM_WORKERS", None)
+        else:
+            os.environ["TRANSFORM_WORKERS"] = previous_workers
+
+@contextmanager
+def _profile(mode, base):
+    if mode == "cprofile":
+        main_profiler = cProfile.Profile()
+        thread_profilers = []
+        lock = threading.Lock()
+
+        def profile_new_thread(frame, event, arg):
+            # First profile event of each new thread: swap in its own profiler
+            sys.setprofile(None)
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another profiling tool owns this thread; leave it unprofiled
+                return
+            with lock:
+                thread_profilers.append(profiler)
+
+        if PER_THREAD_PROFILERS:
+            threading.setprofile(profile_new_thread)
+        main_profiler.enable()
+        try:
+            yield
+        finally:
+            main_profiler.disable()
+            if PER_THREAD_PROFILERS:
+                threading.setprofile(None)
+            with lock:
+                profilers = [main_profiler] + thread_profilers
+            stats = None
+            for profiler in profilers:
+                profiler.disable()
+                try:
+                    if stats is None:
+                        stats = pstats.Stats(profiler)
+                    else:
+                        stats.add(profiler)
+                except TypeError:
+                    # pstats refuses a profiler that recorded no calls
+                    continue
+            if stats is None:
+                print("No calls were profiled")
+            else:
+                stats.dump_stats(f"{base}.prof")
+                print(f"Profile of {len(profilers)} threads saved to {base}.prof")
+
+    elif mode == "sample":
+        sampler = StackSampler()
+        sampler.start()
+        try:
+            yield
+        finally:
+            sampler.stop()
+            sampler.write_folded(f"{base}.folded")
+            print(f"{sum(sampler.stacks.values())} stack samples saved to {base}.folded")
+
+    else:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        try:
+            yield
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            snapshot.dump(f"{base}.tracemalloc")
+            with open(f"{base}-top.txt", "w", encoding="utf-8") as f:
+                f.write(f"Peak traced memory: {peak / 1e6:.1f} MB\n\n")
+                for stat in snapshot.statistics("lineno")[:30]:
+                    f.write(f"{stat}\n")
+            print(f"Allocation snapshot saved to {base}.tracemalloc "
+                  f"(peak {peak / 1e6:.1f} MB, top allocations in {base}-top.txt)")
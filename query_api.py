@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Small read-only HTTP API over the cfb database.
+
+Endpoints (all GET, JSON responses):
+    /teams/<team_id>/seasons/<year>        team-season summary
+    /head-to-head/<team_id>/<opp_team_id>  head-to-head record and meetings
+    /standings/<year>?conference=<name>    conference standings
+
+Successful responses are served from an in-process LRU cache with a TTL and
+carry an ETag, so clients that send a matching If-None-Match get a 304
+without a body. Not-found responses are never cached, so a team-season
+appears as soon as it is loaded. The
+queries only use find() against the indexes the loaders create, so the
+service runs against Atlas, a local mongod (set MONGO_URI) or any
+pymongo-compatible embedded store passed to QueryService.
+
+Usage:
+    python query_api.py --port 8000 --ttl 300
+"""
+import argparse
+import hashlib
+import json
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from mongo_client import connect_to_mongodb
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after `ttl` seconds"""
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def is_missing(value):
+    """None or NaN (CSV-loaded documents store unplayed scores as NaN)"""
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+def clean_document(value):
+    """Make Mongo documents JSON-safe (NaN -> null)"""
+    if isinstance(value, dict):
+        return {k: clean_document(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [clean_document(v) for v in value]
+    if is_missing(value):
+        return None
+    return value
+
+
+class QueryService:
+    """Runs the API queries against a pymongo-compatible database"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def team_season_summary(self, team_id, year):
+        record = self.db.records.find_one({"teamId": team_id, "year": year}, {"_id": 0})
+        if record is None:
+            return None
+        games = list(self.db.games.find(
+            {"team_id": team_id, "year": year},
+            {"_id": 0, "id": 1, "week": 1, "start_date": 1, "game_location": 1,
+             "opp_team_id": 1, "home_team": 1, "away_team": 1,
+             "home_points": 1, "away_points": 1},
+        ).sort("week", 1))
+        stats = {
+            stat["statName"]: stat["statValue"]
+            for stat in self.db.teamstats.find(
+                {"team": record.get("team"), "year": year},
+                {"_id": 0, "statName": 1, "statValue": 1},
+            )
+        }
+        return {"record": record, "games": games, "stats": stats}
+
+    def head_to_head(self, team_id, opp_team_id):
+        games = list(self.db.games.find(
+            {"team_id": team_id, "opp_team_id": opp_team_id},
+            {"_id": 0, "id": 1, "year": 1, "week": 1, "start_date": 1,
+             "game_location": 1, "home_points": 1, "away_points": 1},
+        ).sort([("year", 1), ("week", 1)]))
+
+        # Prefer the pre-aggregated pair built by head_to_head.py
+        summary = self.db.head_to_head.find_one(
+            {"team_id": team_id, "opp_team_id": opp_team_id}, {"_id": 0})
+        if summary is not None:
+            summary["meetings"] = games
+            return summary
+
+        wins = losses = ties = 0
+        for game in games:
+            if is_missing(game.get("home_points")) or is_missing(game.get("away_points")):
+                continue
+            points, opp_points = game["home_points"], game["away_points"]
+            if game.get("game_location") == "Away":
+                points, opp_points = opp_points, points
+            if points > opp_points:
+                wins += 1
+            elif points < opp_points:
+                losses += 1
+            else:
+                ties += 1
+        return {"team_id": team_id, "opp_team_id": opp_team_id,
+                "games": wins + losses + ties, "wins": wins, "losses": losses,
+                "ties": ties, "meetings": games}
+
+    def conference_standings(self, year, conference=None):
+        query = {"year": year}
+        if conference:
+            query["conference"] = conference
+        records = self.db.records.find(
+            query,
+            {"_id": 0, "teamId": 1, "team": 1, "conference": 1, "division": 1,
+             "conferenceGames": 1, "total": 1},
+        ).sort([("conference", 1), ("conferenceGames.wins", -1), ("total.wins", -1)])
+        return {"year": year, "conference": conference, "standings": list(records)}
+
+
+# (pattern, handler name, argument converters)
+ROUTES = [
+    (re.compile(r"^/teams/(\d+)/seasons/(\d+)$"), "team_season_summary", (int, int)),
+    (re.compile(r"^/head-to-head/(\d+)/(\d+)$"), "head_to_head", (int, int)),
+    (re.compile(r"^/standings/(\d+)$"), "conference_standings", (int,)),
+]
+
+def make_etag(body):
+    return '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+
+def etag_matches(if_none_match, etag):
+    """
+    Whether an If-None-Match header matches `etag`: '*' or any listed tag,
+    compared exactly after dropping the weak W/ prefix.
+    """
+    if not if_none_match or not etag:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == "*" or tag == etag:
+            return True
+    return False
+
+def build_handler(service, cache):
+    """Create a request handler class bound to a service and cache"""
+
+    class QueryHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            cache_key = self.path
+            cached = cache.get(cache_key)
+            if cached is None:
+                cached = self.run_query(url)
+                if cached is None:
+                    return
+                # Misses stay uncached so newly loaded data is visible at once
+                if cached[0] == 200:
+                    cache.set(cache_key, cached)
+            status, body, etag = cached
+
+            if etag_matches(self.headers.get("If-None-Match"), etag):
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            if etag:
+                self.send_header("Cache-Control", f"max-age={cache.ttl}")
+                self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def run_query(self, url):
+            for pattern, name, converters in ROUTES:
+                match = pattern.match(url.path)
+                if not match:
+                    continue
+                args = [convert(v) for convert, v in zip(converters, match.groups())]
+                if name == "conference_standings":
+                    args.append(parse_qs(url.query).get("conference", [None])[0])
+                try:
+                    result = getattr(service, name)(*args)
+                except Exception as e:
+                    print(f"Error running {name}: {str(e)}")
+                    self.send_error(500, "Query failed")
+                    return None
+                if result is None:
+                    body = json.dumps({"error": "Not found"}).encode()
+                    return 404, body, None
+                body = json.dumps(clean_document(result), default=str).encode()
+                return 200, body, make_etag(body)
+            body = json.dumps({"error": "Unknown endpoint"}).encode()
+            return 404, body, None
+
+        def log_message(self, format, *args):
+            pass
+
+    return QueryHandler
+
+def create_server(db, host="127.0.0.1", port=8000, ttl=300, cache_size=1024):
+    """Create (but do not start) the API server for a database"""
+    cache = TTLCache(maxsize=cache_size, ttl=ttl)
+    handler = build_handler(QueryService(db), cache)
+    return ThreadingHTTPServer((host, port), handler)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve read queries over the cfb database")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--ttl", type=int, default=300, help="Cache TTL in seconds")
+    parser.add_argument("--cache-size", type=int, default=1024, help="Maximum cached responses")
+    args = parser.parse_args(argv)
+
+    db = connect_to_mongodb()
+    server = create_server(db, args.host, args.port, args.ttl, args.cache_size)
+    print(f"Serving on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Shutting down")
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Compressed archive of raw API responses.
+
+Every fetcher writes the untouched JSON it receives to a zstd-compressed
+JSON Lines shard per endpoint and season:
+
+    raw_archive/<endpoint>/<year>.jsonl.zst      (one API record per line)
+    raw_archive/teams/all.jsonl.zst              (endpoints without seasons)
+
+Per-game player stats are requested game by game, so their season shard
+holds one line per game, {"gameId": ..., "response": [...]}, with the
+response exactly as received.
+
+read_shard()/iter_archive() stream the records back, so transform fixes can
+be re-run over the full history locally instead of refetching 25 seasons,
+e.g. `python stream_pipeline.py games --from-archive --sink csv` or
+`python cli.py fetch teams --from-archive`.
+
+Needs the `zstandard` package; without it fetchers keep working and simply
+skip archiving (with a one-time warning). Set RAW_ARCHIVE_DIR to change the
+archive location, or to an empty string to turn archiving off.
+
+Usage:
+    python raw_archive.py                list archived shards
+    python raw_archive.py games          list shards for one endpoint
+"""
+import io
+import json
+import os
+import sys
+import threading
+
+# Imported for its side effect: .env is loaded before RAW_ARCHIVE_DIR is read
+import api_config
+
+ARCHIVE_DIR = os.getenv("RAW_ARCHIVE_DIR", "raw_archive")
+
+# Compression level; 10 compresses JSON well while staying fast to write
+ZSTD_LEVEL = 10
+
+_warned = False
+_warn_lock = threading.Lock()
+
+
+def _zstd():
+    import zstandard
+    return zstandard
+
+def archive_path(endpoint, year=None, root=ARCHIVE_DIR):
+    """Path of the shard holding one endpoint/season"""
+    name = "all" if year is None else str(year)
+    return os.path.join(root, endpoint, f"{name}.jsonl.zst")
+
+def write_shard(endpoint, year, records, root=ARCHIVE_DIR):
+    """Write one season of raw records, replacing any previous shard atomically"""
+    zstandard = _zstd()
+    path = archive_path(endpoint, year, root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{threading.get_ident()}.tmp"
+    compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+    with open(temp_path, "wb") as f:
+        with compressor.stream_writer(f) as writer:
+            for record in records:
+                writer.write(json.dumps(record, separators=(",", ":")).encode("utf-8"))
+                writer.write(b"\n")
+    os.replace(temp_path, path)
+    return path
+
+def archive_response(endpoint, year, records):
+    """
+    Archive a raw API response if archiving is enabled and available.
+    Never raises, so a full disk or missing codec cannot break a fetch.
+    """
+    global _warned
+    if not ARCHIVE_DIR or not records:
+        return None
+    try:
+        return write_shard(endpoint, year, records)
+    except ImportError:
+        with _warn_lock:
+            if not _warned:
+                print("Warning: zstandard is not installed, raw API responses are not archived")
+                _warned = True
+    except Exception as err:
+        print(f"Error archiving {endpoint} for {year}: {err}")
+    return None
+
+def read_shard(endpoint, year=None, root=ARCHIVE_DIR):
+    """Stream the records of one shard"""
+    zstandard = _zstd()
+    path = archive_path(endpoint, year, root)
+    with open(path, "rb") as f:
+        reader = zstandard.ZstdDecompressor().stream_reader(f)
+        for line in io.TextIOWrapper(reader, encoding="utf-8"):
+            if line.strip():
+                yield json.loads(line)
+
+def load_shard(endpoint, year=None, root=ARCHIVE_DIR):
+    """Records of one shard as a list, or None if it was never archived"""
+    if not os.path.exists(archive_path(endpoint, year, root)):
+        print(f"No archived {endpoint} data for {year}")
+        return None
+    return list(read_shard(endpoint, year, root))
+
+def archived_years(endpoint, root=ARCHIVE_DIR):
+    """Seasons archived for an endpoint, in order"""
+    directory = os.path.join(root, endpoint)
+    if not os.path.isdir(directory):
+        return []
+    years = []
+    for name in os.listdir(directory):
+        stem = name.split(".", 1)[0]
+        if name.endswith(".jsonl.zst") and stem.isdigit():
+            years.append(int(stem))
+    return sorted(years)
+
+def iter_archive(endpoint, years=None, root=ARCHIVE_DIR):
+    """Yield (year, records) for each archived season in year order"""
+    for year in years if years is not None else archived_years(endpoint, root):
+        records = load_shard(endpoint, year, root)
+        if records is not None:
+            yield year, records
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not os.path.isdir(ARCHIVE_DIR):
+        print(f"No archive found at {ARCHIVE_DIR}")
+        return
+    endpoints = argv or sorted(os.listdir(ARCHIVE_DIR))
+    for endpoint in endpoints:
+        directory = os.path.join(ARCHIVE_DIR, endpoint)
+        if not os.path.isdir(directory):
+            continue
+        shards = sorted(n for n in os.listdir(directory) if n.endswith(".jsonl.zst"))
+        size = sum(os.path.getsize(os.path.join(directory, n)) for n in shards) / 1e6
+        print(f"{endpoint:<20} {len(shards):>3} shards {size:8.2f} MB")
+
+if __name__ == "__main__":
+    main()
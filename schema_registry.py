@@ -0,0 +1,205 @@
+"""
+Registry of the columns each API endpoint returns.
+
+Every endpoint has a versioned, ordered and typed column list. Writers use
+it for a stable column order (instead of the order of a set), and fetchers
+and loaders compare what they actually received against it so API changes
+show up as a compact drift report rather than silently added or dropped
+columns. Bump an endpoint's version whenever its column list changes.
+"""
+
+# Column specs are (name, type) or (name, "dict", [subfields]); "dict"
+# columns are expanded to name_subfield when rows are flattened.
+RECORD_GROUP_FIELDS = ["games", "wins", "losses", "ties"]
+
+SCHEMAS = {
+    "games": {
+        "version": 1,
+        "columns": [
+            ("id", "int"),
+            ("season", "int"),
+            ("week", "int"),
+            ("season_type", "str"),
+            ("start_date", "str"),
+            ("start_time_tbd", "bool"),
+            ("completed", "bool"),
+            ("neutral_site", "bool"),
+            ("conference_game", "bool"),
+            ("attendance", "int"),
+            ("venue_id", "int"),
+            ("venue", "str"),
+            ("home_id", "int"),
+            ("home_team", "str"),
+            ("home_conference", "str"),
+            ("home_division", "str"),
+            ("home_points", "int"),
+            ("home_line_scores", "list"),
+            ("home_post_win_prob", "float"),
+            ("home_pregame_elo", "int"),
+            ("home_postgame_elo", "int"),
+            ("away_id", "int"),
+            ("away_team", "str"),
+            ("away_conference", "str"),
+            ("away_division", "str"),
+            ("away_points", "int"),
+            ("away_line_scores", "list"),
+            ("away_post_win_prob", "float"),
+            ("away_pregame_elo", "int"),
+            ("away_postgame_elo", "int"),
+            ("excitement_index", "float"),
+            ("highlights", "str"),
+            ("notes", "str"),
+            # Added by dataGetgames.unpivot_games
+            ("year", "int"),
+            ("team_id", "int"),
+            ("game_location", "str"),
+            ("opp_team_id", "int"),
+        ],
+    },
+    "records": {
+        "version": 1,
+        "columns": [
+            ("year", "int"),
+            ("teamId", "int"),
+            ("team", "str"),
+            ("conference", "str"),
+            ("division", "str"),
+            ("expectedWins", "float"),
+            ("total", "dict", RECORD_GROUP_FIELDS),
+            ("conferenceGames", "dict", RECORD_GROUP_FIELDS),
+            ("homeGames", "dict", RECORD_GROUP_FIELDS),
+            ("awayGames", "dict", RECORD_GROUP_FIELDS),
+        ],
+    },
+    "teamstats": {
+        "version": 1,
+        "columns": [
+            ("season", "int"),
+            ("team", "str"),
+            ("conference", "str"),
+            ("statName", "str"),
+            ("statValue", "float"),
+            ("year", "int"),
+        ],
+    },
+    "teams": {
+        "version": 1,
+        "columns": [
+            ("id", "int"),
+            ("school", "str"),
+            ("mascot", "str"),
+            ("abbreviation", "str"),
+            ("alt_name1", "str"),
+            ("alt_name2", "str"),
+            ("alt_name3", "str"),
+            ("classification", "str"),
+            ("conference", "str"),
+            ("color", "str"),
+            ("alt_color", "str"),
+            ("logos", "list"),
+            ("twitter", "str"),
+            ("location", "dict", [
+                "venue_id", "name", "city", "state", "zip", "country_code",
+                "timezone", "latitude", "longitude", "elevation", "capacity",
+                "year_constructed", "grass", "dome",
+            ]),
+        ],
+    },
+    "game_player_stats": {
+        "version": 1,
+        "columns": [
+            ("id", "int"),
+            ("teams", "list"),
+            ("year", "int"),
+            ("gameId", "int"),
+        ],
+    },
+}
+
+# Python types accepted for each registered type (None is always accepted)
+TYPE_CHECKS = {
+    "int": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "float": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "str": lambda v: isinstance(v, str),
+    "bool": lambda v: isinstance(v, bool),
+    "list": lambda v: isinstance(v, list),
+    "dict": lambda v: isinstance(v, dict),
+}
+
+
+def get_schema(endpoint):
+    """Return the registered schema for an endpoint"""
+    if endpoint not in SCHEMAS:
+        raise KeyError(f"No schema registered for endpoint: {endpoint}")
+    return SCHEMAS[endpoint]
+
+def column_names(endpoint, flatten=False):
+    """Registered column names in order, optionally with dict columns expanded"""
+    names = []
+    for spec in get_schema(endpoint)["columns"]:
+        if flatten and spec[1] == "dict":
+            names.extend(f"{spec[0]}_{field}" for field in spec[2])
+        else:
+            names.append(spec[0])
+    return names
+
+def ordered_columns(endpoint, rows, flatten=False):
+    """
+    Column order for writing `rows`: the registered columns first, then any
+    unregistered columns (sorted) so new API fields are kept, not dropped.
+    """
+    names = column_names(endpoint, flatten)
+    known = set(names)
+    extra = set()
+    for row in rows:
+        extra.update(key for key in row if key not in known)
+    return names + sorted(extra)
+
+def check_drift(endpoint, rows, check_types=True):
+    """
+    Compare rows against the registered schema. Returns a dict with the
+    unregistered columns seen (and how often), registered columns never
+    seen, and columns holding values of an unexpected type.
+    """
+    columns = get_schema(endpoint)["columns"]
+    types = {spec[0]: spec[1] for spec in columns}
+    added = {}
+    seen = set()
+    mismatched = {}
+    for row in rows:
+        for key, value in row.items():
+            if key not in types:
+                added[key] = added.get(key, 0) + 1
+                continue
+            seen.add(key)
+            if check_types and value is not None and not TYPE_CHECKS[types[key]](value):
+                observed = mismatched.setdefault(key, {})
+                name = type(value).__name__
+                observed[name] = observed.get(name, 0) + 1
+    missing = [name for name in types if name not in seen] if rows else []
+    return {"added": added, "missing": missing, "mismatched": mismatched}
+
+def format_drift(endpoint, drift):
+    """One-line-per-problem summary of a drift report; empty when there is no drift"""
+    schema = get_schema(endpoint)
+    types = {spec[0]: spec[1] for spec in schema["columns"]}
+    lines = []
+    if drift["added"]:
+        added = ", ".join(f"{k} ({n})" for k, n in sorted(drift["added"].items()))
+        lines.append(f"  new columns: {added}")
+    if drift["missing"]:
+        lines.append(f"  missing columns: {', '.join(drift['missing'])}")
+    for column, observed in sorted(drift["mismatched"].items()):
+        found = ", ".join(f"{t} x{n}" for t, n in observed.items())
+        lines.append(f"  {column}: expected {types[column]}, got {found}")
+    if not lines:
+        return ""
+    return f"Schema drift for {endpoint} (registry v{schema['version']}):\n" + "\n".join(lines)
+
+def report_drift(endpoint, rows, check_types=True):
+    """Print a drift report if rows do not match the registry; returns the drift"""
+    drift = check_drift(endpoint, rows, check_types)
+    summary = format_drift(endpoint, drift)
+    if summary:
+        print(summary)
+    return drift
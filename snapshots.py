@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Versioned dataset snapshots with point-in-time reads.
+
+A snapshot records, for each dataset, the seasons it contains and the
+content hash of each season. Seasons are stored once as immutable Parquet
+files named by their hash, so a snapshot only writes the seasons that
+changed since the last one and every other season is shared:
+
+    snapshots/partitions/<dataset>/<hash>.parquet
+    snapshots/manifests/<snapshot_id>.json
+
+Datasets not included in a new snapshot are carried over from the previous
+one. In MongoDB each season is stored once in <collection>_versions, tagged
+with its '_partition' hash, and the snapshot manifests live in the
+'snapshots' collection. Publishing a snapshot only touches the seasons
+whose hash differs from what the live collection holds. Rolling back means
+publishing an older snapshot.
+
+Needs pyarrow for Parquet.
+
+Usage:
+    python snapshots.py create [dataset ...] [--note "week 6"]
+    python snapshots.py list
+    python snapshots.py diff <old_id> <new_id>
+    python snapshots.py publish <snapshot_id> [dataset ...]
+    python snapshots.py gc --keep 10
+"""
+import argparse
+import hashlib
+import importlib
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+SNAPSHOT_DIR = "snapshots"
+
+# dataset -> (CSV, partition column, loader module, process function, collection)
+DATASETS = {
+    "teams": ("output_directory/teams.csv", None, "load_teams_to_mongodb", "process_team", "teams"),
+    "games": ("output_directory/games_2000_2024.csv", "year", "load_games_to_mongodb", "process_game", "games"),
+    "records": ("output_directory/records_2000_2024.csv", "year", "load_records_to_mongodb", "process_record", "records"),
+    "teamstats": ("output_directory/season_stats_2000_2024.csv", "year", "load_stats_to_mongodb", "process_stat", "teamstats"),
+}
+
+
+def new_snapshot_id():
+    return time.strftime("%Y%m%d-%H%M%S")
+
+def manifest_dir(root=SNAPSHOT_DIR):
+    return os.path.join(root, "manifests")
+
+def partition_path(dataset, digest, root=SNAPSHOT_DIR):
+    return os.path.join(root, "partitions", dataset, f"{digest}.parquet")
+
+def normalize_partition(part):
+    """
+    Give a partition column types that depend only on its own values. pandas
+    infers dtypes over the whole CSV, so one season with a blank cell would
+    otherwise turn an int column into floats (and change the hash) for every
+    season. Whole-number columns become nullable Int64, other numbers
+    float64, True/False columns nullable boolean, and everything else object
+    with None for missing values.
+    """
+    columns = {}
+    for column in part.columns:
+        values = part[column]
+        present = values.dropna()
+        if present.empty:
+            columns[column] = pd.Series([None] * len(values), index=values.index, dtype=object)
+        elif pd.api.types.is_bool_dtype(values) or present.map(type).eq(bool).all():
+            columns[column] = values.astype("boolean")
+        elif pd.api.types.is_numeric_dtype(values):
+            numbers = values.astype("float64")
+            if (present % 1 == 0).all():
+                columns[column] = numbers.astype("Int64")
+            else:
+                columns[column] = numbers
+        else:
+            columns[column] = values.astype(object).where(values.notna(), None)
+    return pd.DataFrame(columns, index=part.index)
+
+def loader_frame(part):
+    """
+    Back from normalize_partition's nullable types to what the loaders get
+    from read_csv for this season alone: int64/bool when complete, float64
+    NaN or object when values are missing, float64 NaN when all are.
+    """
+    part = part.copy()
+    for column in part.columns:
+        values = part[column]
+        missing = values.isna().any()
+        if values.isna().all():
+            part[column] = values.astype("float64")
+        elif isinstance(values.dtype, pd.Int64Dtype):
+            part[column] = values.astype("float64") if missing else values.astype("int64")
+        elif isinstance(values.dtype, pd.BooleanDtype):
+            part[column] = values.astype(object).where(values.notna(), float("nan")) if missing else values.astype(bool)
+        elif values.dtype == object and missing:
+            part[column] = values.where(values.notna(), float("nan"))
+    return part
+
+def partition_hash(df):
+    """Content hash of one partition: column names, dtypes and values"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr([(column, str(dtype)) for column, dtype in df.dtypes.items()]).encode())
+    try:
+        values = pd.util.hash_pandas_object(df, index=False)
+    except TypeError:
+        # Unhashable cells (lists/dicts): hash their text form instead
+        values = pd.util.hash_pandas_object(df.astype(str), index=False)
+    digest.update(values.to_numpy().tobytes())
+    return digest.hexdigest()
+
+def split_partitions(df, key):
+    """Yield (label, partition) per season, or a single 'all' partition"""
+    if key is None or key not in df.columns:
+        yield "all", df.reset_index(drop=True)
+        return
+    for value, part in df.groupby(key, sort=True, dropna=False):
+        label = "none" if pd.isna(value) else str(int(value))
+        yield label, part.reset_index(drop=True)
+
+def write_partition(part, dataset, digest, root=SNAPSHOT_DIR):
+    """Write a partition unless one with the same content already exists"""
+    path = partition_path(dataset, digest, root)
+    if os.path.exists(path):
+        return False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.tmp"
+    part.to_parquet(temp_path, index=False)
+    os.replace(temp_path, path)
+    return True
+
+def list_snapshots(root=SNAPSHOT_DIR):
+    """Snapshot ids, oldest first"""
+    if not os.path.isdir(manifest_dir(root)):
+        return []
+    return sorted(name[:-5] for name in os.listdir(manifest_dir(root)) if name.endswith(".json"))
+
+def load_manifest(snapshot_id=None, root=SNAPSHOT_DIR):
+    """Manifest of a snapshot (the latest when no id is given)"""
+    if snapshot_id is None:
+        snapshots = list_snapshots(root)
+        if not snapshots:
+            raise FileNotFoundError(f"No snapshots in {root}")
+        snapshot_id = snapshots[-1]
+    with open(os.path.join(manifest_dir(root), f"{snapshot_id}.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+def create_snapshot(frames, note="", root=SNAPSHOT_DIR):
+    """
+    Snapshot {dataset: DataFrame}. Only partitions whose content is new are
+    written; datasets not given are carried over from the latest snapshot.
+    """
+    previous = load_manifest(root=root)["datasets"] if list_snapshots(root) else {}
+    manifest = {
+        "id": new_snapshot_id(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "note": note,
+        "datasets": dict(previous),
+    }
+    if os.path.exists(os.path.join(manifest_dir(root), f"{manifest['id']}.json")):
+        raise FileExistsError(f"Snapshot {manifest['id']} already exists")
+
+    for dataset, df in frames.items():
+        key = DATASETS[dataset][1]
+        partitions = {}
+        written = 0
+        for label, part in split_partitions(df, key):
+            part = normalize_partition(part)
+            digest = partition_hash(part)
+            written += write_partition(part, dataset, digest, root)
+            partitions[label] = {"hash": digest, "rows": len(part)}
+        manifest["datasets"][dataset] = {"partition_key": key, "partitions": partitions}
+        print(f"{dataset}: {len(partitions)} partitions, {written} new, "
+              f"{len(partitions) - written} shared")
+
+    os.makedirs(manifest_dir(root), exist_ok=True)
+    with open(os.path.join(manifest_dir(root), f"{manifest['id']}.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"Created snapshot {manifest['id']}")
+    return manifest
+
+def read_snapshot(dataset, snapshot_id=None, partitions=None, root=SNAPSHOT_DIR):
+    """Read a dataset as of a snapshot, optionally limited to some partition labels"""
+    entry = load_manifest(snapshot_id, root)["datasets"].get(dataset)
+    if entry is None:
+        raise KeyError(f"Snapshot has no {dataset} dataset")
+    labels = [label for label in entry["partitions"] if partitions is None or label in partitions]
+    frames = [pd.read_parquet(partition_path(dataset, entry["partitions"][label]["hash"], root))
+              for label in labels]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+def diff_snapshots(old_id, new_id, root=SNAPSHOT_DIR):
+    """Partitions added, removed or changed per dataset between two snapshots"""
+    old = load_manifest(old_id, root)["datasets"]
+    new = load_manifest(new_id, root)["datasets"]
+    changes = {}
+    for dataset in sorted(set(old) | set(new)):
+        before = old.get(dataset, {}).get("partitions", {})
+        after = new.get(dataset, {}).get("partitions", {})
+        changes[dataset] = {
+            "added": sorted(set(after) - set(before)),
+            "removed": sorted(set(before) - set(after)),
+            "changed": sorted(label for label in set(before) & set(after)
+                              if before[label]["hash"] != after[label]["hash"]),
+        }
+    return changes
+
+def collect_garbage(keep, root=SNAPSHOT_DIR):
+    """Delete all but the newest `keep` snapshots and partitions nothing refers to"""
+    snapshots = list_snapshots(root)
+    for snapshot_id in snapshots[:-keep] if keep else snapshots:
+        os.remove(os.path.join(manifest_dir(root), f"{snapshot_id}.json"))
+    referenced = set()
+    for snapshot_id in list_snapshots(root):
+        for dataset, entry in load_manifest(snapshot_id, root)["datasets"].items():
+            referenced.update((dataset, p["hash"]) for p in entry["partitions"].values())
+    removed = 0
+    partitions_root = os.path.join(root, "partitions")
+    for dataset in os.listdir(partitions_root) if os.path.isdir(partitions_root) else []:
+        for name in os.listdir(os.path.join(partitions_root, dataset)):
+            if (dataset, name.split(".", 1)[0]) not in referenced:
+                os.remove(os.path.join(partitions_root, dataset, name))
+                removed += 1
+    print(f"Removed {removed} unreferenced partitions")
+    return removed
+
+def store_partition_versions(db, dataset, digest, part, teams):
+    """Process one partition like its loader and store it once, tagged with its hash"""
+    from dedup import drop_duplicates
+    from document_shaping import shape_documents
+    from parallel_transform import transform_frame
+    from validation import quarantine, validate_frame
+
+    _, _, module_name, process_name, collection_name = DATASETS[dataset]
+    process = getattr(importlib.import_module(module_name), process_name)
+    part, rejected = validate_frame(loader_frame(part), dataset, teams)
+    quarantine(rejected, dataset, db)
+    documents = drop_duplicates(transform_frame(part, process), collection_name)
+    documents = shape_documents(documents, collection_name)
+    for document in documents:
+        document["_partition"] = digest
+    versions = db[f"{collection_name}_versions"]
+    # Clear anything left by an interrupted publish of this partition
+    versions.delete_many({"_partition": digest})
+    if documents:
+        versions.insert_many(documents)
+    return len(documents)
+
+def ensure_live_indexes(live, dataset):
+    """
+    Give a live collection its loader's query indexes the first time it is
+    published to; later publishes keep the indexes it already has.
+    """
+    if "natural_key" not in live.index_information():
+        importlib.import_module(DATASETS[dataset][2]).create_indexes(live)
+    live.create_index([("_partition", 1)])
+
+def publish_snapshot(db, snapshot_id=None, datasets=None, root=SNAPSHOT_DIR):
+    """
+    Make the live collections match a snapshot. Partitions already stored in
+    <collection>_versions are not re-read, and seasons whose hash matches the
+    live collection are left alone.
+    """
+    from validation import team_keys_from_db
+
+    manifest = load_manifest(snapshot_id, root)
+    db.snapshots.replace_one({"_id": manifest["id"]}, manifest, upsert=True)
+    # Teams first, so the other datasets are checked against the published teams
+    order = [name for name in DATASETS if name in manifest["datasets"]]
+    for dataset in order:
+        if datasets and dataset not in datasets:
+            continue
+        collection_name = DATASETS[dataset][4]
+        versions = db[f"{collection_name}_versions"]
+        versions.create_index([("_partition", 1)])
+        live = db[collection_name]
+        ensure_live_indexes(live, dataset)
+        wanted = {p["hash"] for p in manifest["datasets"][dataset]["partitions"].values()}
+
+        stored = set(versions.distinct("_partition"))
+        teams = team_keys_from_db(db) if dataset != "teams" else None
+        for digest in sorted(wanted - stored):
+            part = pd.read_parquet(partition_path(dataset, digest, root))
+            store_partition_versions(db, dataset, digest, part, teams)
+
+        removed = live.delete_many({"_partition": {"$nin": list(wanted)}}).deleted_count
+        present = set(live.distinct("_partition"))
+        missing = sorted(wanted - present)
+        if missing:
+            # Server-side copy of only the partitions the live collection lacks
+            versions.aggregate([
+                {"$match": {"_partition": {"$in": missing}}},
+                {"$project": {"_id": 0}},
+                {"$merge": {"into": collection_name, "whenMatched": "replace", "whenNotMatched": "insert"}},
+            ])
+        db.snapshot_pointers.replace_one(
+            {"_id": dataset}, {"_id": dataset, "snapshot": manifest["id"]}, upsert=True)
+        print(f"{dataset}: published {len(wanted)} partitions "
+              f"({len(missing)} copied in, {removed} documents removed)")
+    return manifest["id"]
+
+def find_at_snapshot(db, dataset, snapshot_id, query=None, projection=None):
+    """Query a dataset as of any snapshot that was published to this database"""
+    manifest = db.snapshots.find_one({"_id": snapshot_id})
+    if manifest is None or dataset not in manifest["datasets"]:
+        raise KeyError(f"Snapshot {snapshot_id} with {dataset} has not been published")
+    hashes = [p["hash"] for p in manifest["datasets"][dataset]["partitions"].values()]
+    versions = db[f"{DATASETS[dataset][4]}_versions"]
+    return versions.find({**(query or {}), "_partition": {"$in": hashes}}, projection)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Versioned dataset snapshots")
+    parser.add_argument("--root", default=SNAPSHOT_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    create = commands.add_parser("create", help="Snapshot the current CSVs")
+    create.add_argument("datasets", nargs="*", help=f"Datasets to snapshot ({', '.join(DATASETS)})")
+    create.add_argument("--note", default="")
+    commands.add_parser("list", help="List snapshots")
+    diff = commands.add_parser("diff", help="Compare two snapshots")
+    diff.add_argument("old")
+    diff.add_argument("new")
+    publish = commands.add_parser("publish", help="Make MongoDB match a snapshot")
+    publish.add_argument("snapshot")
+    publish.add_argument("datasets", nargs="*", help="Datasets to publish (default: all)")
+    gc = commands.add_parser("gc", help="Remove old snapshots and unreferenced partitions")
+    gc.add_argument("--keep", type=int, default=10)
+    args = parser.parse_args(argv)
+    unknown = set(getattr(args, "datasets", [])) - set(DATASETS)
+    if unknown:
+        parser.error(f"unknown datasets: {', '.join(sorted(unknown))}")
+
+    try:
+        if args.command == "create":
+            frames = {}
+            for dataset in args.datasets or DATASETS:
+                csv_path = DATASETS[dataset][0]
+                if not os.path.exists(csv_path):
+                    print(f"CSV file not found: {csv_path}, skipping {dataset}")
+                    continue
+                frames[dataset] = pd.read_csv(csv_path)
+            create_snapshot(frames, args.note, args.root)
+        elif args.command == "list":
+            for snapshot_id in list_snapshots(args.root):
+                manifest = load_manifest(snapshot_id, args.root)
+                counts = ", ".join(f"{name} {len(entry['partitions'])}"
+                                   for name, entry in manifest["datasets"].items())
+                print(f"{snapshot_id}  {counts}  {manifest['note']}")
+        elif args.command == "diff":
+            for dataset, change in diff_snapshots(args.old, args.new, args.root).items():
+                summary = ", ".join(f"{kind} {', '.join(labels)}" for kind, labels in change.items() if labels)
+                print(f"{dataset:<12} {summary or 'unchanged'}")
+        elif args.command == "publish":
+            from mongo_client import connect_to_mongodb
+            publish_snapshot(connect_to_mongodb(), args.snapshot, args.datasets, args.root)
+        else:
+            collect_garbage(args.keep, args.root)
+    except ImportError as err:
+        print(f"Error: {err}. Snapshots are stored as Parquet and need pyarrow installed.")
+        sys.exit(1)
+    except (FileNotFoundError, FileExistsError, KeyError) as err:
+        print(f"Error: {err}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Streaming fetch -> transform -> load pipeline.
+
+Each season flows through three stages connected by bounded asyncio queues,
+so season N is being transformed and written while season N+1 is still
+downloading. Total wall time approaches the slowest stage rather than the
+sum of all stages.
+
+Usage:
+    python stream_pipeline.py games --sink mongo
+    python stream_pipeline.py records --sink csv --start 2010 --end 2024
+    python stream_pipeline.py games --sink csv --from-archive
+"""
+import argparse
+import asyncio
+import csv
+import os
+import sys
+import time
+from functools import partial
+
+import dataGetgames
+import dataGetrecords
+import dataGetteamstats
+import load_games_to_mongodb
+import load_records_to_mongodb
+import load_stats_to_mongodb
+from api_config import season_csv_name
+from dedup import Deduplicator, upsert_documents
+from document_shaping import print_size_report, shape_documents
+from mongo_client import connect_to_mongodb, print_pool_report
+from partitioned_fetch import RateLimiter, default_limiter
+from raw_archive import load_shard
+from schema_registry import ordered_columns, report_drift
+from validation import print_validation_report, quarantine, team_keys_from_db, validate_rows
+
+# Marks the end of the stream on every queue
+_DONE = object()
+
+
+def fetch_games(year):
+    """Fetch one season of games"""
+    return dataGetgames.fetch_games_for_year(year)
+
+def fetch_records(year):
+    """Fetch one season of team records"""
+    return dataGetrecords.fetch_records_for_year(year)
+
+def fetch_teamstats(year):
+    """Fetch one season of team season stats"""
+    return dataGetteamstats.fetch_season_stats(year, dataGetteamstats.get_api_key())
+
+def tag_year(rows, year):
+    """Tag every row with its season year"""
+    for row in rows:
+        row["year"] = year
+    return rows
+
+def flatten_record(row):
+    """
+    Expand nested dictionaries into 'col_key' fields, matching the layout
+    produced by cleaned_data/cleanrecords.py.
+    """
+    flat = {}
+    for key, value in row.items():
+        if isinstance(value, dict):
+            for sub_key, sub_value in value.items():
+                flat[f"{key}_{sub_key}"] = sub_value
+        else:
+            flat[key] = value
+    return flat
+
+# Per-dataset stage functions. 'rows' reshapes a raw season payload
+# (unpivot / year tagging), 'process' applies the loader's typing rules.
+DATASETS = {
+    "games": {
+        "fetch": fetch_games,
+        "rows": dataGetgames.unpivot_games,
+        "process": load_games_to_mongodb.process_game,
+        "schema": "games",
+        "collection": "games",
+        "create_indexes": load_games_to_mongodb.create_indexes,
+        "csv_prefix": "games",
+    },
+    "records": {
+        "fetch": fetch_records,
+        "rows": lambda records, year: records,
+        "process": load_records_to_mongodb.process_record,
+        "schema": "records",
+        "collection": "records",
+        "create_indexes": load_records_to_mongodb.create_indexes,
+        "csv_prefix": "records_clean",
+    },
+    "teamstats": {
+        "fetch": fetch_teamstats,
+        "rows": tag_year,
+        "process": load_stats_to_mongodb.process_stat,
+        "schema": "teamstats",
+        "collection": "teamstats",
+        "create_indexes": load_stats_to_mongodb.create_indexes,
+        "csv_prefix": "season_stats",
+    },
+}
+
+
+class StageTimer:
+    """Accumulates the time each stage spends doing work (not waiting on queues)"""
+
+    def __init__(self):
+        self.busy = {}
+
+    def add(self, stage, seconds):
+        self.busy[stage] = self.busy.get(stage, 0.0) + seconds
+
+    def report(self, wall):
+        print("\nStage timings:")
+        for stage, seconds in self.busy.items():
+            print(f"  {stage:<10} {seconds:8.2f}s busy")
+        print(f"  {'wall':<10} {wall:8.2f}s "
+              f"(sum of stages {sum(self.busy.values()):.2f}s)")
+
+
+class CsvSink:
+    """Append each transformed season to a CSV file"""
+
+    def __init__(self, path, schema, flatten=False):
+        self.path = path
+        self.schema = schema
+        self.flatten = flatten
+        self.file = None
+        self.writer = None
+
+    def open(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.file = open(self.path, "w", newline="", encoding="utf-8")
+
+    def write(self, year, rows):
+        if self.flatten:
+            rows = [flatten_record(row) for row in rows]
+        if self.writer is None:
+            # The registry fixes the header up front; only columns the API
+            # adds after the first season (already reported as drift) are dropped
+            headers = ordered_columns(self.schema, rows, flatten=self.flatten)
+            self.writer = csv.DictWriter(self.file, fieldnames=headers,
+                                         extrasaction="ignore")
+            self.writer.writeheader()
+        extra = set()
+        for row in rows:
+            extra.update(set(row) - set(self.writer.fieldnames))
+        if extra:
+            print(f"Warning: {year} has columns missing from the header, dropped: {sorted(extra)}")
+        self.writer.writerows(rows)
+        return len(rows)
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            print(f"CSV file has been saved to: {self.path}")
+
+
+class MongoSink:
+    """Insert each transformed season into a MongoDB collection"""
+
+    def __init__(self, db, dataset):
+        self.db = db
+        self.collection_name = dataset["collection"]
+        self.collection = db[self.collection_name]
+        self.create_indexes = dataset["create_indexes"]
+        # Spans every season, so a game repeated across batches is caught too
+        self.deduplicator = Deduplicator(self.collection_name)
+
+    def open(self):
+        self.create_indexes(self.collection)
+
+    def write(self, year, rows):
+        rows = self.deduplicator.filter(rows)
+        rows = shape_documents(rows, self.collection_name)
+        if not rows:
+            return 0
+        return upsert_documents(self.collection, rows, self.collection_name)
+
+    def close(self):
+        print(self.deduplicator.report())
+
+
+async def fetch_stage(dataset, years, out_queue, timer, limiter):
+    """Download each season and hand the raw payload downstream"""
+    for year in years:
+        # Share the process-wide API rate budget with any other fetchers
+        await asyncio.to_thread(limiter.acquire)
+        print(f"Fetching {year}...")
+        start = time.perf_counter()
+        payload = await asyncio.to_thread(dataset["fetch"], year)
+        timer.add("fetch", time.perf_counter() - start)
+        if not payload:
+            print(f"No data retrieved for {year}")
+            continue
+        # Blocks while the queue is full, so a slow sink throttles fetching
+        await out_queue.put((year, payload))
+    await out_queue.put(_DONE)
+
+def transform_season(dataset, year, payload, teams=None, db=None):
+    """Reshape, validate and type one season of raw API data"""
+    rows = dataset["rows"](payload, year)
+    report_drift(dataset["schema"], rows)
+    rows, rejected = validate_rows(rows, dataset["schema"], teams)
+    quarantine(rejected, dataset["schema"], db)
+    return [dataset["process"](row) for row in rows]
+
+async def transform_stage(dataset, in_queue, out_queue, timer, teams=None, db=None):
+    """Run the unpivot/validation/typing rules on each season"""
+    while True:
+        item = await in_queue.get()
+        if item is _DONE:
+            break
+        year, payload = item
+        start = time.perf_counter()
+        rows = await asyncio.to_thread(transform_season, dataset, year, payload, teams, db)
+        timer.add("transform", time.perf_counter() - start)
+        await out_queue.put((year, rows))
+    await out_queue.put(_DONE)
+
+async def sink_stage(sink, in_queue, timer):
+    """Write each season as soon as it is ready"""
+    total = 0
+    while True:
+        item = await in_queue.get()
+        if item is _DONE:
+            break
+        year, rows = item
+        start = time.perf_counter()
+        written = await asyncio.to_thread(sink.write, year, rows)
+        timer.add("load", time.perf_counter() - start)
+        total += written
+        print(f"Wrote {written} rows for {year}")
+    return total
+
+async def run_pipeline(dataset, years, sink, queue_size=2, limiter=None):
+    """
+    Run the fetch, transform and load stages concurrently over the given years.
+    Returns the number of rows written.
+    """
+    timer = StageTimer()
+    raw_queue = asyncio.Queue(maxsize=queue_size)
+    rows_queue = asyncio.Queue(maxsize=queue_size)
+
+    # Database sinks also get team reference checks and quarantine there;
+    # otherwise rejected rows go to quarantine/ files
+    db = getattr(sink, "db", None)
+    teams = await asyncio.to_thread(team_keys_from_db, db) if db is not None else None
+
+    start = time.perf_counter()
+    await asyncio.to_thread(sink.open)
+    try:
+        _, _, total = await asyncio.gather(
+            fetch_stage(dataset, years, raw_queue, timer, limiter or default_limiter),
+            transform_stage(dataset, raw_queue, rows_queue, timer, teams, db),
+            sink_stage(sink, rows_queue, timer),
+        )
+    finally:
+        await asyncio.to_thread(sink.close)
+    timer.report(time.perf_counter() - start)
+    return total
+
+def build_sink(name, dataset, output_dir, years):
+    """Create the sink selected on the command line"""
+    if name == "csv":
+        # Named after the streamed seasons, so a partial run never replaces the full history
+        path = os.path.join(output_dir, season_csv_name(dataset["csv_prefix"], years))
+        return CsvSink(path, dataset["schema"], flatten=True)
+    db = connect_to_mongodb()
+    return MongoSink(db, dataset)
+
+def replay_from_archive(dataset):
+    """
+    Read raw seasons from the local archive instead of the API. Archived
+    payloads are the untouched API JSON, so they go through the same
+    transform stage, and no rate budget is needed.
+    """
+    return dict(dataset, fetch=partial(load_shard, dataset["schema"])), RateLimiter(float("inf"))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream seasons from the API into a sink")
+    parser.add_argument("dataset", choices=sorted(DATASETS))
+    parser.add_argument("--sink", choices=["mongo", "csv"], default="mongo")
+    parser.add_argument("--start", type=int, default=2000, help="First season (inclusive)")
+    parser.add_argument("--end", type=int, default=2024, help="Last season (inclusive)")
+    parser.add_argument("--queue-size", type=int, default=2,
+                        help="Seasons buffered between stages")
+    parser.add_argument("--rate", type=float,
+                        help="API requests per second (defaults to the shared budget)")
+    parser.add_argument("--output-dir", default="output_directory")
+    parser.add_argument("--from-archive", action="store_true",
+                        help="Re-transform raw responses from raw_archive/ instead of fetching")
+    args = parser.parse_args(argv)
+
+    dataset = DATASETS[args.dataset]
+    limiter = RateLimiter(args.rate) if args.rate else None
+    if args.from_archive:
+        dataset, limiter = replay_from_archive(dataset)
+    years = range(args.start, args.end + 1)
+    sink = build_sink(args.sink, dataset, args.output_dir, years)
+    total = asyncio.run(run_pipeline(dataset, years, sink, args.queue_size, limiter))
+    if not total:
+        print("No rows written.")
+        sys.exit(1)
+    print(f"Successfully streamed {total} {args.dataset} rows")
+    print_validation_report()
+    if args.sink == "mongo":
+        print_size_report()
+        print_pool_report()
+
+if __name__ == "__main__":
+    main()
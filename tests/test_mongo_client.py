@@ -0,0 +1,23 @@
+import pytest
+
+pytest.importorskip("pymongo")
+
+from mongo_client import client_options, uses_tls
+
+
+@pytest.mark.parametrize("uri, expected", [
+    ("mongodb://localhost:27017", False),
+    ("mongodb://localhost:27017/cfb?retryWrites=true", False),
+    ("mongodb+srv://user:pw@cluster0.example.mongodb.net/?retryWrites=true", True),
+    ("mongodb://a:27017,b:27017/?replicaSet=rs0&tls=true", True),
+    ("mongodb://localhost:27017/?ssl=TRUE", True),
+    ("mongodb+srv://user:pw@cluster0.example.mongodb.net/?tls=false", False),
+])
+def test_uses_tls(uri, expected):
+    assert uses_tls(uri) is expected
+
+def test_ca_file_only_for_tls():
+    assert "tlsCAFile" not in client_options("mongodb://localhost:27017")
+    assert "tlsCAFile" in client_options("mongodb+srv://user:pw@cluster0.example.mongodb.net/")
+    # A CA file given in the URI is left alone
+    assert "tlsCAFile" not in client_options("mongodb://host/?tls=true&tlsCAFile=/etc/ca.pem")
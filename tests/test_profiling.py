@@ -0,0 +1,55 @@
+import os
+import pstats
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import profiling
+
+
+def busy():
+    return sum(range(50000))
+
+def run_threaded_stage(tmp_path):
+    with profiling.profile_stage("stage", "cprofile", run_id="test", output_dir=str(tmp_path)):
+        with ThreadPoolExecutor(2) as executor:
+            results = list(executor.map(lambda _: busy(), range(2)))
+    stats = pstats.Stats(str(tmp_path / "stage-test.prof"))
+    calls = sum(value[0] for key, value in stats.stats.items() if key[2] == "busy")
+    return results, calls
+
+@pytest.mark.skipif(sys.version_info >= (3, 12), reason="per-thread profilers are for Python < 3.12")
+def test_per_thread_profilers_cover_worker_threads(tmp_path):
+    assert profiling.PER_THREAD_PROFILERS
+    results, calls = run_threaded_stage(tmp_path)
+    assert results == [busy()] * 2
+    assert calls == 2
+
+@pytest.mark.skipif(sys.version_info >= (3, 12), reason="per-thread profilers are for Python < 3.12")
+def test_thread_profiler_that_cannot_enable_is_skipped(tmp_path, monkeypatch):
+    class MainThreadOnlyProfile(profiling.cProfile.Profile):
+        def enable(self):
+            if threading.current_thread() is not threading.main_thread():
+                raise ValueError("Another profiling tool is already active")
+            super().enable()
+
+    monkeypatch.setattr(profiling.cProfile, "Profile", MainThreadOnlyProfile)
+    results, calls = run_threaded_stage(tmp_path)
+    assert results == [busy()] * 2
+    assert calls == 0
+
+def test_single_profiler_keeps_threads_running(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PER_THREAD_PROFILERS", False)
+    results, calls = run_threaded_stage(tmp_path)
+    assert results == [busy()] * 2
+    if sys.version_info >= (3, 12):
+        # sys.monitoring-based cProfile sees every thread
+        assert calls == 2
+
+def test_transform_workers_restored(tmp_path, monkeypatch):
+    monkeypatch.setenv("TRANSFORM_WORKERS", "4")
+    with profiling.profile_stage("stage", "sample", run_id="test", output_dir=str(tmp_path)):
+        assert os.environ["TRANSFORM_WORKERS"] == "1"
+    assert os.environ["TRANSFORM_WORKERS"] == "4"
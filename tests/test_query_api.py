@@ -0,0 +1,126 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+from query_api import QueryService, TTLCache, create_server, etag_matches
+
+
+@pytest.fixture
+def db():
+    db = mongomock.MongoClient().cfb
+    db.records.insert_many([
+        {"teamId": 1, "team": "Alpha", "year": 2023, "conference": "East",
+         "conferenceGames": {"wins": 1}, "total": {"wins": 2, "losses": 0}},
+        {"teamId": 2, "team": "Beta", "year": 2023, "conference": "East",
+         "conferenceGames": {"wins": 0}, "total": {"wins": 0, "losses": 2}},
+    ])
+    db.games.insert_many([
+        {"id": 10, "team_id": 1, "opp_team_id": 2, "year": 2023, "week": 2,
+         "game_location": "Away", "home_points": 14, "away_points": 21},
+        {"id": 11, "team_id": 1, "opp_team_id": 2, "year": 2023, "week": 1,
+         "game_location": "Home", "home_points": 28, "away_points": float("nan")},
+        {"id": 12, "team_id": 1, "opp_team_id": 3, "year": 2023, "week": 3,
+         "game_location": "Home", "home_points": 31, "away_points": 7},
+    ])
+    db.teamstats.insert_many([
+        {"team": "Alpha", "year": 2023, "statName": "totalYards", "statValue": 5000},
+        {"team": "Alpha", "year": 2022, "statName": "totalYards", "statValue": 4000},
+    ])
+    return db
+
+@pytest.fixture
+def server(db):
+    server = create_server(db, port=0, ttl=60)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def get(server, path, headers=None):
+    url = f"http://127.0.0.1:{server.server_address[1]}{path}"
+    request = urllib.request.Request(url, headers=headers or {})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as err:
+        return err.code, err.headers, err.read()
+
+def test_team_season_summary(db):
+    summary = QueryService(db).team_season_summary(1, 2023)
+    assert summary["record"]["team"] == "Alpha"
+    assert [game["id"] for game in summary["games"]] == [11, 10, 12]
+    assert summary["stats"] == {"totalYards": 5000}
+    assert QueryService(db).team_season_summary(1, 1999) is None
+
+def test_head_to_head_counts_from_games(db):
+    result = QueryService(db).head_to_head(1, 2)
+    # The away win counts from team 1's side; the game with NaN points is skipped
+    assert (result["games"], result["wins"], result["losses"]) == (1, 1, 0)
+    assert len(result["meetings"]) == 2
+
+def test_head_to_head_prefers_aggregate(db):
+    db.head_to_head.insert_one({"team_id": 1, "opp_team_id": 2, "games": 5, "wins": 4})
+    result = QueryService(db).head_to_head(1, 2)
+    assert result["games"] == 5
+    assert len(result["meetings"]) == 2
+
+def test_conference_standings(db):
+    standings = QueryService(db).conference_standings(2023, "East")["standings"]
+    assert [team["teamId"] for team in standings] == [1, 2]
+
+def test_ttl_cache_expires_and_evicts():
+    cache = TTLCache(maxsize=2, ttl=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("c", 3)
+    assert cache.get("a") is None
+    assert cache.get("c") == 3
+    time.sleep(0.06)
+    assert cache.get("c") is None
+
+@pytest.mark.parametrize("header, expected", [
+    ('"abc"', True),
+    ('"xyz", "abc"', True),
+    ('W/"abc"', True),
+    ("*", True),
+    ('"abcd"', False),
+    ('"ab"', False),
+    ("", False),
+    (None, False),
+])
+def test_etag_matches(header, expected):
+    assert etag_matches(header, '"abc"') is expected
+
+def test_etag_revalidation(server):
+    status, headers, body = get(server, "/teams/1/seasons/2023")
+    assert status == 200
+    assert json.loads(body)["games"][0]["away_points"] is None
+    etag = headers["ETag"]
+
+    status, _, body = get(server, "/teams/1/seasons/2023", {"If-None-Match": f'"other", {etag}'})
+    assert (status, body) == (304, b"")
+    # A tag that merely contains the current one is not a match
+    status, _, _ = get(server, "/teams/1/seasons/2023", {"If-None-Match": etag[:-1] + 'x"'})
+    assert status == 200
+
+def test_not_found_is_not_cached(server, db):
+    status, headers, _ = get(server, "/teams/3/seasons/2023")
+    assert status == 404
+    assert "ETag" not in headers
+
+    db.records.insert_one({"teamId": 3, "team": "Gamma", "year": 2023})
+    status, _, body = get(server, "/teams/3/seasons/2023")
+    assert status == 200
+    assert json.loads(body)["record"]["team"] == "Gamma"
+
+def test_unknown_endpoint(server):
+    status, _, body = get(server, "/nope")
+    assert status == 404
+    assert json.loads(body) == {"error": "Unknown endpoint"}
@@ -0,0 +1,107 @@
+import io
+import os
+from itertools import count
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+pymongo = pytest.importorskip("pymongo")
+
+import snapshots
+from mongo_client import client_options
+
+# $merge needs a real server; point MONGO_TEST_URI at one to run these tests
+MONGO_TEST_URI = os.getenv("MONGO_TEST_URI", "mongodb://localhost:27017")
+
+
+@pytest.fixture
+def db():
+    # Same options as the loaders use, so the test also covers the shared client setup
+    client = pymongo.MongoClient(MONGO_TEST_URI, serverSelectionTimeoutMS=500,
+                                 **client_options(MONGO_TEST_URI))
+    try:
+        client.admin.command("ping")
+    except pymongo.errors.PyMongoError:
+        client.close()
+        pytest.skip(f"No MongoDB server at {MONGO_TEST_URI}")
+    name = f"cfb_snapshot_test_{os.getpid()}"
+    client.drop_database(name)
+    yield client[name]
+    client.drop_database(name)
+    client.close()
+
+@pytest.fixture(autouse=True)
+def sequential_ids(monkeypatch):
+    # Snapshot ids are timestamps; keep them unique within one test
+    ids = count(1)
+    monkeypatch.setattr(snapshots, "new_snapshot_id", lambda: f"snap-{next(ids):02d}")
+
+def record(team_id, year, wins):
+    return {
+        "teamId": team_id, "team": f"Team {team_id}", "year": year,
+        "conference": "East", "division": None, "expectedWins": 5.0,
+        "total": repr({"games": 12, "wins": wins, "losses": 12 - wins, "ties": 0}),
+        "conferenceGames": repr({"games": 8, "wins": 4, "losses": 4, "ties": 0}),
+        "homeGames": repr({"games": 6, "wins": 3, "losses": 3, "ties": 0}),
+        "awayGames": repr({"games": 6, "wins": 3, "losses": 3, "ties": 0}),
+    }
+
+def wins(db, year):
+    return {doc["teamId"]: doc["total"]["wins"] for doc in db.records.find({"year": year})}
+
+def partition_hashes(manifest, dataset):
+    return {label: p["hash"] for label, p in manifest["datasets"][dataset]["partitions"].items()}
+
+def test_appending_a_season_keeps_earlier_hashes(tmp_path):
+    root = str(tmp_path)
+    complete = "id,year,home_points,neutral_site\n1,2023,10,True\n2,2023,20,False\n"
+    # The new season's blanks make read_csv infer float/object for the whole file
+    first = snapshots.create_snapshot({"games": pd.read_csv(io.StringIO(complete))}, root=root)
+    second = snapshots.create_snapshot(
+        {"games": pd.read_csv(io.StringIO(complete + "3,2024,,\n"))}, root=root)
+
+    assert partition_hashes(second, "games")["2023"] == partition_hashes(first, "games")["2023"]
+    assert len(os.listdir(os.path.join(root, "partitions", "games"))) == 2
+
+def test_publish_copies_changed_seasons_and_rolls_back(db, tmp_path):
+    root = str(tmp_path)
+    first = pd.DataFrame([record(1, 2022, 8), record(2, 2022, 4), record(1, 2023, 9)])
+    snapshots.create_snapshot({"records": first}, root=root)
+    assert snapshots.publish_snapshot(db, "snap-01", root=root) == "snap-01"
+
+    assert db.records.count_documents({}) == 3
+    assert wins(db, 2023) == {1: 9}
+    # A first publish leaves the loader's query indexes on the live collection
+    indexes = db.records.index_information()
+    assert {"natural_key", "year_1_teamId_1", "conference_1_year_1", "_partition_1"} <= set(indexes)
+    assert db.snapshot_pointers.find_one({"_id": "records"})["snapshot"] == "snap-01"
+
+    second = first.copy()
+    second.loc[2, "total"] = repr({"games": 12, "wins": 11, "losses": 1, "ties": 0})
+    snapshots.create_snapshot({"records": second}, root=root)
+    untouched = {doc["_id"] for doc in db.records.find({"year": 2022})}
+    snapshots.publish_snapshot(db, "snap-02", root=root)
+
+    assert wins(db, 2023) == {1: 11}
+    # The unchanged season was not rewritten
+    assert {doc["_id"] for doc in db.records.find({"year": 2022})} == untouched
+    assert db.records.count_documents({}) == 3
+
+    snapshots.publish_snapshot(db, "snap-01", root=root)
+    assert wins(db, 2023) == {1: 9}
+    assert wins(db, 2022) == {1: 8, 2: 4}
+    assert db.snapshot_pointers.find_one({"_id": "records"})["snapshot"] == "snap-01"
+
+    # Both versions stay queryable by snapshot
+    at_second = snapshots.find_at_snapshot(db, "records", "snap-02", {"year": 2023})
+    assert [doc["total"]["wins"] for doc in at_second] == [11]
+
+def test_publish_drops_removed_seasons(db, tmp_path):
+    root = str(tmp_path)
+    snapshots.create_snapshot({"records": pd.DataFrame([record(1, 2022, 8), record(1, 2023, 9)])}, root=root)
+    snapshots.publish_snapshot(db, "snap-01", root=root)
+    snapshots.create_snapshot({"records": pd.DataFrame([record(1, 2023, 9)])}, root=root)
+    snapshots.publish_snapshot(db, "snap-02", root=root)
+
+    assert db.records.distinct("year") == [2023]
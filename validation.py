@@ -0,0 +1,213 @@
+"""
+Column-wise validation of rows before they are transformed and loaded.
+
+Each dataset has a set of rules: required keys, numeric columns (with
+optional ranges), boolean columns, list/dict columns (native values or
+their string form from CSV) and references to the teams collection. Every
+rule is checked over a whole column at once, and a row failing any rule is
+set aside with the names of the rules it failed. Rejected rows are written
+in bulk to a 'quarantine' collection (or quarantine/<dataset>.jsonl when
+there is no database), and per-rule counts are kept for the run report.
+"""
+import json
+import math
+import os
+import time
+from ast import literal_eval
+
+import numpy as np
+import pandas as pd
+
+from document_shaping import to_native
+
+YEAR_RANGE = (1869, 2100)
+
+RULES = {
+    "games": {
+        "required": ["id", "team_id", "year"],
+        "numeric": {
+            "id": None, "team_id": None, "opp_team_id": None,
+            "home_id": None, "away_id": None, "venue_id": None,
+            "year": YEAR_RANGE,
+            "home_points": (0, 250), "away_points": (0, 250),
+            "home_pregame_elo": None, "home_postgame_elo": None,
+            "away_pregame_elo": None, "away_postgame_elo": None,
+            "home_post_win_prob": (0, 1), "away_post_win_prob": (0, 1),
+            "excitement_index": None,
+        },
+        "boolean": ["conference_game", "start_time_tbd", "neutral_site", "completed"],
+        "list": ["home_line_scores", "away_line_scores"],
+        "teams": {"team_id": "id", "opp_team_id": "id"},
+    },
+    "records": {
+        "required": ["teamId", "year"],
+        "numeric": {"teamId": None, "year": YEAR_RANGE, "expectedWins": (0, 20)},
+        "dict": ["total", "conferenceGames", "homeGames", "awayGames"],
+        "teams": {"teamId": "id"},
+    },
+    "teamstats": {
+        "required": ["team", "year", "statName", "statValue"],
+        "numeric": {"year": YEAR_RANGE, "statValue": None},
+        "teams": {"team": "school"},
+    },
+    "teams": {
+        "required": ["id", "school"],
+        "numeric": {"id": None},
+        "list": ["logos"],
+        "dict": ["location"],
+    },
+}
+
+# Python types the list/dict rules expect after literal_eval
+LITERAL_TYPES = {"list": list, "dict": dict}
+
+# dataset -> {"rows": n, "rejected": n, "checks": {rule: n}}
+validation_report = {}
+
+
+def team_keys_from_db(db):
+    """Team ids and school names for reference checks, or None if teams are not loaded"""
+    ids = db.teams.distinct("id")
+    if not ids:
+        print("Teams collection is empty; skipping team reference checks")
+        return None
+    return {"id": set(ids), "school": set(db.teams.distinct("school"))}
+
+def parses_as(text, expected):
+    """True if literal_eval turns the string into an `expected` instance"""
+    try:
+        return isinstance(literal_eval(text), expected)
+    except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+        return False
+
+def literal_check(series, expected):
+    """
+    Whether each value is (or is the repr of) a list/dict the transforms can
+    parse. Native values are checked through their repr, and each distinct
+    string is parsed once rather than once per row.
+    """
+    text = series.astype(str).str.strip()
+    parsed = {value: parses_as(value, expected) for value in text[series.notna()].unique()}
+    return text.map(parsed).fillna(True).astype(bool)
+
+def find_failures(df, dataset, teams=None):
+    """
+    Run every rule for `dataset` over `df`. Returns a Series with the
+    failed rule names for each row ("" for valid rows) and per-rule counts.
+    """
+    rules = RULES[dataset]
+    reasons = pd.Series("", index=df.index, dtype=object)
+    counts = {}
+
+    def fail(name, mask):
+        mask = np.asarray(mask, dtype=bool)
+        if mask.any():
+            reasons[mask] += name + ";"
+            counts[name] = counts.get(name, 0) + int(mask.sum())
+
+    for column in rules.get("required", []):
+        if column not in df.columns:
+            fail(f"missing:{column}", np.ones(len(df), dtype=bool))
+        else:
+            fail(f"missing:{column}", df[column].isna())
+
+    for column, bounds in rules.get("numeric", {}).items():
+        if column not in df.columns:
+            continue
+        values = pd.to_numeric(df[column], errors="coerce")
+        # inf passes to_numeric but int(float(x)) in the transforms rejects it
+        fail(f"type:{column}", df[column].notna() & ~np.isfinite(values.to_numpy(dtype=float, na_value=np.nan)))
+        if bounds:
+            fail(f"range:{column}", (values < bounds[0]) | (values > bounds[1]))
+
+    for column in rules.get("boolean", []):
+        if column in df.columns:
+            text = df[column].astype(str).str.lower()
+            fail(f"type:{column}", df[column].notna() & ~text.isin(["true", "false"]))
+
+    for kind, expected in LITERAL_TYPES.items():
+        for column in rules.get(kind, []):
+            if column in df.columns:
+                fail(f"type:{column}", df[column].notna() & ~literal_check(df[column], expected))
+
+    if teams:
+        for column, team_field in rules.get("teams", {}).items():
+            if column not in df.columns:
+                continue
+            values = df[column]
+            if team_field == "id":
+                values = pd.to_numeric(values, errors="coerce")
+            fail(f"unknown_team:{column}", values.notna() & ~values.isin(teams[team_field]))
+
+    return reasons, counts
+
+def record_report(dataset, rows, rejected, counts):
+    entry = validation_report.setdefault(dataset, {"rows": 0, "rejected": 0, "checks": {}})
+    entry["rows"] += rows
+    entry["rejected"] += rejected
+    for name, count in counts.items():
+        entry["checks"][name] = entry["checks"].get(name, 0) + count
+
+def validate_frame(df, dataset, teams=None):
+    """Split a DataFrame into (valid rows, rejected rows with a _reasons column)"""
+    reasons, counts = find_failures(df, dataset, teams)
+    bad = (reasons != "").to_numpy()
+    record_report(dataset, len(df), int(bad.sum()), counts)
+    rejected = df[bad].assign(_reasons=reasons[bad])
+    return df[~bad], rejected
+
+def validate_rows(rows, dataset, teams=None):
+    """
+    Same as validate_frame for a list of row dicts (raw API data). Valid rows
+    are returned as the original dicts so nested values keep their types.
+    """
+    if not rows:
+        return rows, pd.DataFrame()
+    df = pd.DataFrame(rows)
+    valid, rejected = validate_frame(df, dataset, teams)
+    return [rows[i] for i in valid.index], rejected
+
+def plain_value(value):
+    value = to_native(value)
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+def quarantine(rejected, dataset, db=None, output_dir="quarantine"):
+    """Write rejected rows in bulk to the quarantine collection or a JSON Lines file"""
+    if rejected is None or rejected.empty:
+        return 0
+    quarantined_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+    documents = []
+    for row in rejected.to_dict("records"):
+        reasons = row.pop("_reasons").rstrip(";").split(";")
+        documents.append({
+            "dataset": dataset,
+            "reasons": reasons,
+            "quarantined_at": quarantined_at,
+            "row": {key: plain_value(value) for key, value in row.items()},
+        })
+
+    if db is not None:
+        collection = db.quarantine
+        collection.insert_many(documents)
+        collection.create_index([("dataset", 1), ("quarantined_at", 1)])
+        print(f"Quarantined {len(documents)} {dataset} rows in the quarantine collection")
+    else:
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, f"{dataset}.jsonl")
+        with open(path, "a", encoding="utf-8") as f:
+            for document in documents:
+                f.write(json.dumps(document, default=str) + "\n")
+        print(f"Quarantined {len(documents)} {dataset} rows in {path}")
+    return len(documents)
+
+def print_validation_report():
+    """Print rows checked, rejected and failures per rule for each dataset"""
+    if not validation_report:
+        return
+    print("\nValidation report:")
+    for dataset, entry in validation_report.items():
+        print(f"  {dataset:<12} {entry['rows']:>8} rows, {entry['rejected']:>6} quarantined")
+        for name, count in sorted(entry["checks"].items()):
+            print(f"    {name:<32} {count:>6}")
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Venue dimension and travel distances.
+
+Builds one row per venue from the teams' home stadium ('location') data and
+computes, in a single vectorized haversine pass, how far each team travelled
+to every game: from its home venue to the game's venue_id. Home games at the
+team's own stadium come out as 0 km, so away and neutral-site games are the
+rows with real travel.
+
+Known gap: coordinates only come from team home stadiums, so games at a
+venue that is no team's home (most bowl and other neutral sites) get no
+travel_km. Those venues are counted and listed when the travel table is
+built (see unresolved_venues); filling them would mean sourcing venues from
+the API's /venues endpoint as well.
+
+With --sink mongo, venues are stored as GeoJSON points under a 2dsphere
+index (see venues_near) and distances go to the 'game_travel' sidecar
+collection, keyed by (id, team_id) like game_metrics.
+
+Usage:
+    python venues.py
+    python venues.py --sink mongo
+"""
+import argparse
+import os
+import sys
+from ast import literal_eval
+
+import numpy as np
+import pandas as pd
+from pymongo import GEOSPHERE
+
+from mongo_client import connect_to_mongodb
+
+EARTH_RADIUS_KM = 6371.0088
+
+# teams location_ column -> venue field
+VENUE_COLUMNS = {
+    "location_venue_id": "venue_id",
+    "location_name": "name",
+    "location_city": "city",
+    "location_state": "state",
+    "location_country_code": "country_code",
+    "location_timezone": "timezone",
+    "location_latitude": "latitude",
+    "location_longitude": "longitude",
+    "location_elevation": "elevation",
+    "location_capacity": "capacity",
+    "location_year_constructed": "year_constructed",
+    "location_grass": "grass",
+    "location_dome": "dome",
+}
+
+TRAVEL_COLUMNS = ["id", "team_id", "opp_team_id", "year", "venue_id", "game_location", "neutral_site"]
+
+
+def read_team_locations(csv_path):
+    """
+    Read teams with flat location_ columns. Accepts the raw teams.csv (where
+    'location' is a dict string) or cleaned_data/teams_cleaned.csv.
+    """
+    teams = pd.read_csv(csv_path)
+    if "location" in teams.columns:
+        locations = [literal_eval(value) if isinstance(value, str) and value else {}
+                     for value in teams["location"]]
+        expanded = pd.DataFrame(locations, index=teams.index).add_prefix("location_")
+        teams = teams.drop(columns="location").join(expanded)
+    return teams
+
+def build_venues(teams):
+    """One row per venue with coordinates, plus the ids of the teams based there"""
+    columns = [column for column in VENUE_COLUMNS if column in teams.columns]
+    venues = teams[columns + ["id"]].rename(columns=VENUE_COLUMNS)
+    for column in ["venue_id", "latitude", "longitude", "elevation", "capacity", "year_constructed"]:
+        if column in venues.columns:
+            venues[column] = pd.to_numeric(venues[column], errors="coerce")
+    venues = venues.dropna(subset=["venue_id", "latitude", "longitude"])
+    venues["venue_id"] = venues["venue_id"].astype(int)
+
+    team_ids = venues.groupby("venue_id")["id"].agg(lambda ids: sorted(int(i) for i in ids))
+    venues = venues.drop(columns="id").drop_duplicates("venue_id").set_index("venue_id")
+    venues["team_ids"] = team_ids
+    return venues.reset_index()
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km between arrays of coordinates (degrees)"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(a, dtype=float)) for a in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+def compute_travel(games, teams, venues):
+    """
+    Distance from each team's home venue to the venue of every game it played.
+    `games` is the team-perspective games table (one row per team per game).
+    """
+    coordinates = venues.set_index("venue_id")[["latitude", "longitude"]]
+    home_venue = pd.to_numeric(teams.set_index("id")["location_venue_id"], errors="coerce")
+    home_venue = home_venue[~home_venue.index.duplicated()]
+
+    travel = games[[column for column in TRAVEL_COLUMNS if column in games.columns]].copy()
+    team_ids = pd.to_numeric(travel["team_id"], errors="coerce")
+    venue_ids = pd.to_numeric(travel["venue_id"], errors="coerce")
+    travel["home_venue_id"] = home_venue.reindex(team_ids).to_numpy()
+
+    # Label lookups over whole columns instead of a per-row join
+    home = coordinates.reindex(travel["home_venue_id"]).to_numpy()
+    away = coordinates.reindex(venue_ids).to_numpy()
+    travel["travel_km"] = haversine_km(home[:, 0], home[:, 1], away[:, 0], away[:, 1]).round(1)
+    return travel
+
+def unresolved_venues(travel, venues):
+    """
+    Game venue_ids with no coordinates (no team is based there), with the
+    number of team-game rows at each, most used first.
+    """
+    venue_ids = pd.to_numeric(travel["venue_id"], errors="coerce")
+    missing = venue_ids.notna() & ~venue_ids.isin(venues["venue_id"])
+    return venue_ids[missing].astype(int).value_counts()
+
+def save_venues_to_mongodb(venues, db):
+    """Replace the venues collection, with GeoJSON points under a 2dsphere index"""
+    collection = db.venues
+    collection.drop()
+    documents = []
+    for venue in venues.replace({np.nan: None}).to_dict("records"):
+        venue["location"] = {"type": "Point",
+                             "coordinates": [venue.pop("longitude"), venue.pop("latitude")]}
+        documents.append({k: v for k, v in venue.items() if v is not None})
+    if documents:
+        collection.insert_many(documents)
+    collection.create_index([("venue_id", 1)], unique=True)
+    collection.create_index([("location", GEOSPHERE)])
+    return len(documents)
+
+def save_travel_to_mongodb(travel, db):
+    """Replace the game_travel sidecar collection"""
+    collection = db.game_travel
+    collection.drop()
+    collection.create_index([("id", 1), ("team_id", 1)])
+    collection.create_index([("team_id", 1), ("year", 1)])
+    documents = travel.replace({np.nan: None}).to_dict("records")
+    if not documents:
+        return 0
+    result = collection.insert_many(documents)
+    return len(result.inserted_ids)
+
+def venues_near(db, longitude, latitude, max_km):
+    """Venues within max_km of a point, nearest first"""
+    query = {"location": {"$nearSphere": {
+        "$geometry": {"type": "Point", "coordinates": [longitude, latitude]},
+        "$maxDistance": max_km * 1000,
+    }}}
+    return list(db.venues.find(query, {"_id": 0}))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the venue dimension and travel distances")
+    parser.add_argument("--teams", default="output_directory/teams.csv")
+    parser.add_argument("--games", default="output_directory/games_2000_2024.csv")
+    parser.add_argument("--sink", choices=["csv", "mongo"], default="csv")
+    parser.add_argument("--output-dir", default="output_directory")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.teams):
+        print(f"CSV file not found: {args.teams}")
+        sys.exit(1)
+
+    print(f"Reading CSV file: {args.teams}")
+    teams = read_team_locations(args.teams)
+    venues = build_venues(teams)
+    print(f"Built {len(venues)} venues from {len(teams)} teams")
+
+    travel = None
+    if os.path.exists(args.games):
+        print(f"Reading CSV file: {args.games}")
+        games = pd.read_csv(args.games)
+        travel = compute_travel(games, teams, venues)
+        located = travel["travel_km"].notna().sum()
+        print(f"Computed travel for {located} of {len(travel)} team-game rows "
+              f"({len(travel) - located} without coordinates)")
+        unresolved = unresolved_venues(travel, venues)
+        if not unresolved.empty:
+            print(f"{len(unresolved)} venues ({unresolved.sum()} team-game rows) are no team's home "
+                  f"and have no coordinates; most used venue_ids: "
+                  f"{', '.join(str(v) for v in unresolved.index[:10])}")
+    else:
+        print(f"No games file at {args.games}, skipping travel distances")
+
+    if args.sink == "mongo":
+        db = connect_to_mongodb()
+        print(f"Successfully inserted {save_venues_to_mongodb(venues, db)} venues into MongoDB")
+        if travel is not None:
+            print(f"Successfully inserted {save_travel_to_mongodb(travel, db)} travel rows into MongoDB")
+    else:
+        os.makedirs(args.output_dir, exist_ok=True)
+        venues_path = os.path.join(args.output_dir, "venues.csv")
+        venues.to_csv(venues_path, index=False)
+        print(f"Venues saved to {venues_path}")
+        if travel is not None:
+            travel_path = os.path.join(args.output_dir, "game_travel_2000_2024.csv")
+            travel.to_csv(travel_path, index=False)
+            print(f"Travel distances saved to {travel_path}")
+
+if __name__ == "__main__":
+    main()
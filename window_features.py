@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Rolling and cumulative team-season window features.
+
+Computes features such as a 3-season win% or a cumulative conference record
+with grouped, vectorized pandas operations sorted by (team, year). Appending
+a new season only recomputes the affected tail windows: the last
+`window - 1` seasons of each team are used as context for the rolling
+windows and each team's last cumulative totals are carried forward.
+
+Usage:
+    python window_features.py records
+    python window_features.py records --append output_directory/records_2025_clean.csv
+    python window_features.py stats
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Seasons covered by each rolling window
+WINDOW = 3
+
+RECORDS_SPEC = {
+    "input": "output_directory/records_2000s_clean.csv",
+    "output": "output_directory/records_window_features.csv",
+    "key": "teamId",
+    "rolling": ["total_wins", "total_games"],
+    "rolling_agg": "sum",
+    "cumulative": [
+        "total_wins", "total_losses", "total_ties",
+        "conferenceGames_wins", "conferenceGames_losses", "conferenceGames_ties",
+    ],
+}
+
+STATS_SPEC = {
+    "input": "output_directory/season_stats_2000_2024.csv",
+    "output": "output_directory/season_stats_window_features.csv",
+    "key": "team",
+    # Every stat column is averaged over the window
+    "rolling": None,
+    "rolling_agg": "mean",
+    "cumulative": [],
+}
+
+
+def safe_divide(numerator, denominator):
+    """Element-wise division that yields NaN instead of inf for empty seasons"""
+    numerator = np.asarray(numerator, dtype=float)
+    denominator = np.asarray(denominator, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, numerator / denominator, np.nan)
+
+def pivot_season_stats(stats):
+    """Reshape the long season stats table into one row per (team, year)"""
+    wide = stats.pivot_table(index=["team", "year"], columns="statName",
+                             values="statValue", aggfunc="first")
+    wide.columns.name = None
+    return wide.reset_index()
+
+def rolling_columns(df, spec):
+    """Columns the rolling window is applied to"""
+    if spec["rolling"] is not None:
+        return spec["rolling"]
+    return [c for c in df.select_dtypes("number").columns if c not in (spec["key"], "year")]
+
+def derive_ratios(df, spec):
+    """Turn rolling and cumulative counts into percentages"""
+    if spec is RECORDS_SPEC:
+        df["win_pct"] = safe_divide(df["total_wins"], df["total_games"])
+        df[f"win_pct_roll{WINDOW}"] = safe_divide(df[f"total_wins_roll{WINDOW}"],
+                                                  df[f"total_games_roll{WINDOW}"])
+        conference_games = (df["conferenceGames_wins_cum"] + df["conferenceGames_losses_cum"]
+                            + df["conferenceGames_ties_cum"])
+        df["conference_win_pct_cum"] = safe_divide(df["conferenceGames_wins_cum"], conference_games)
+    return df
+
+def add_rolling(df, spec, columns):
+    """Add `<col>_roll<WINDOW>` for each column, grouped by team"""
+    grouped = df.groupby(spec["key"], sort=False)[columns].rolling(WINDOW, min_periods=1)
+    rolled = getattr(grouped, spec["rolling_agg"])().reset_index(level=0, drop=True)
+    for column in columns:
+        df[f"{column}_roll{WINDOW}"] = rolled[column]
+    return df
+
+def compute_window_features(df, spec):
+    """Compute every window feature over the full history"""
+    df = df.sort_values([spec["key"], "year"], kind="stable").reset_index(drop=True)
+    df = add_rolling(df, spec, rolling_columns(df, spec))
+    grouped = df.groupby(spec["key"], sort=False)
+    for column in spec["cumulative"]:
+        df[f"{column}_cum"] = grouped[column].cumsum()
+    return derive_ratios(df, spec)
+
+def update_window_features(features, new_rows, spec):
+    """
+    Merge new (or re-fetched) seasons into an existing feature table,
+    recomputing only the seasons from the earliest new year onward.
+    """
+    key = spec["key"]
+    first_year = new_rows["year"].min()
+    raw_columns = [c for c in new_rows.columns if c in features.columns]
+
+    history = features[features["year"] < first_year]
+    # Seasons already featurized at or after first_year are affected too;
+    # new rows win over existing rows for the same (team, year)
+    tail = pd.concat([features.loc[features["year"] >= first_year, raw_columns], new_rows[raw_columns]])
+    tail = tail.drop_duplicates([key, "year"], keep="last")
+
+    # Rolling windows need the previous WINDOW - 1 seasons of each team
+    context = history.sort_values([key, "year"]).groupby(key).tail(WINDOW - 1)
+    combined = pd.concat([context[raw_columns], tail])
+    combined = combined.sort_values([key, "year"], kind="stable").reset_index(drop=True)
+    combined = add_rolling(combined, spec, rolling_columns(combined, spec))
+    recomputed = combined[combined["year"] >= first_year].reset_index(drop=True)
+
+    # Cumulative totals continue from each team's last season in history
+    last = history.sort_values([key, "year"]).groupby(key).tail(1).set_index(key)
+    grouped = recomputed.groupby(key, sort=False)
+    for column in spec["cumulative"]:
+        offset = recomputed[key].map(last[f"{column}_cum"]).fillna(0).to_numpy()
+        recomputed[f"{column}_cum"] = grouped[column].cumsum().to_numpy() + offset
+    recomputed = derive_ratios(recomputed, spec)
+
+    updated = pd.concat([history, recomputed], ignore_index=True)
+    return updated.sort_values([key, "year"], kind="stable").reset_index(drop=True)
+
+def read_input(path, spec):
+    """Read a records or season stats CSV in the shape the features expect"""
+    if not os.path.exists(path):
+        print(f"CSV file not found: {path}")
+        sys.exit(1)
+    print(f"Reading CSV file: {path}")
+    df = pd.read_csv(path)
+    if spec is STATS_SPEC:
+        df = pivot_season_stats(df)
+    return df
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute rolling and cumulative team-season features")
+    parser.add_argument("dataset", choices=["records", "stats"])
+    parser.add_argument("--input", help="Full-history CSV (defaults to the dataset's output file)")
+    parser.add_argument("--output", help="Feature CSV to write")
+    parser.add_argument("--append", help="CSV of new seasons to merge into the existing feature file")
+    args = parser.parse_args(argv)
+
+    spec = RECORDS_SPEC if args.dataset == "records" else STATS_SPEC
+    output = args.output or spec["output"]
+
+    if args.append:
+        if not os.path.exists(output):
+            print(f"Feature file not found: {output}. Run without --append first.")
+            sys.exit(1)
+        features = pd.read_csv(output)
+        new_rows = read_input(args.append, spec)
+        print(f"Updating features from {new_rows['year'].min()} onward...")
+        features = update_window_features(features, new_rows, spec)
+    else:
+        df = read_input(args.input or spec["input"], spec)
+        print(f"Computing window features for {len(df)} team seasons...")
+        features = compute_window_features(df, spec)
+
+    features.to_csv(output, index=False)
+    print(f"Window features saved to {output}")
+
+if __name__ == "__main__":
+    main()